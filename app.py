@@ -1,89 +1,19 @@
 import streamlit as st
 import pandas as pd
 import os
-import io
-import csv
-
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Table,
-    TableStyle,
-    Paragraph,
-    Spacer
-)
-from reportlab.lib import colors, pagesizes
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-from reportlab.pdfbase import pdfmetrics
-
-
-# =====================================================
-# DATA CLEANING FUNCTION  ✅ ADDED
-# =====================================================
-def clean_vacancy_data(df):
-
-    df.columns = df.columns.str.strip()
-
-    # Remove newline characters & extra spaces
-    for col in df.columns:
-        if df[col].dtype == "object":
-            df[col] = df[col].astype(str).str.replace("\n", " ", regex=False).str.strip()
-
-    # Convert vacancy columns to numeric
-    vacancy_cols = ["UR", "SC", "ST", "OBC", "EWS", "Total"]
-    for col in vacancy_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
-
-    return df
-
-
-# =====================================================
-# PDF GENERATION FUNCTION
-# =====================================================
-def generate_pdf(df):
-
-    buffer = io.BytesIO()
-
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=pagesizes.A4
-    )
-
-    elements = []
-
-    pdfmetrics.registerFont(UnicodeCIDFont('HYSMyeongJo-Medium'))
-
-    title_style = ParagraphStyle(
-        name="TitleStyle",
-        fontName="HYSMyeongJo-Medium",
-        fontSize=14,
-        alignment=1
-    )
-
-    elements.append(Paragraph("SSC CGL 2025 Category Prediction Report", title_style))
-    elements.append(Spacer(1, 12))
-
-    data = [df.columns.tolist()] + df.astype(str).values.tolist()
-
-    table = Table(data, repeatRows=1)
-
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'HYSMyeongJo-Medium'),
-        ('FONTSIZE', (0, 0), (-1, -1), 7),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-
-    elements.append(table)
-
-    doc.build(elements)
-
-    buffer.seek(0)
-    return buffer
 
+from core.engine import (
+    load_rank_index,
+    insert_candidate,
+    load_allocation,
+    qualifying_rule,
+    get_posts_df,
+    load_score_distribution,
+    start_profile,
+    profile_records,
+    summarize_profile_log,
+)
+from core.report import generate_pdf
 
 # =====================================================
 # PAGE CONFIG
@@ -98,6 +28,11 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# stage timings are recorded for this rerun and shown at the bottom when
+# the app is opened with ?debug=1
+debug = st.query_params.get("debug") == "1"
+start_profile(debug)
+
 # =====================================================
 # NAVIGATION
 # =====================================================
@@ -171,20 +106,13 @@ elif st.session_state.page == "Predictor":
             st.error(f"❌ {file} not found in project folder.")
             st.stop()
 
-    df_overall = pd.read_csv(OVERALL_FILE)
-    df_stat = pd.read_csv(STAT_FILE)
-    df_vac = pd.read_csv(VAC_FILE)
-
-    # ✅ CLEAN VACANCY DATA
-    df_vac = clean_vacancy_data(df_vac)
+    # ✅ CACHED POST CATALOG (re-read only when the file changes on disk)
+    posts = get_posts_df(VAC_FILE)
 
     # ---------------------------
     # PREPARE DATA
     # ---------------------------
-    df_overall["TotalScore"] = df_overall["Main Paper Marks"]
-    df_stat["TotalScore"] = (
-        df_stat["Main Paper Marks"] + df_stat["Statistics Marks"]
-    )
+    rank_index = load_rank_index(OVERALL_FILE, STAT_FILE)
 
     user_main = u_main + bonus_main
     user_stat = u_stat + bonus_stat
@@ -193,14 +121,9 @@ elif st.session_state.page == "Predictor":
     # ---------------------------
     # RANK CALCULATION
     # ---------------------------
-    df_overall_sorted = df_overall.sort_values("TotalScore", ascending=False)
-    df_stat_sorted = df_stat.sort_values("TotalScore", ascending=False)
-
-    overall_rank_new = (df_overall_sorted["TotalScore"] > user_main).sum() + 1
-    stat_rank_new = (df_stat_sorted["TotalScore"] > user_total_stat).sum() + 1
-
-    category_df = df_overall_sorted[df_overall_sorted["Category"] == u_cat]
-    category_rank_new = (category_df["TotalScore"] > user_main).sum() + 1
+    overall_rank_new = rank_index.overall_rank(user_main)
+    stat_rank_new = rank_index.stat_rank(user_total_stat)
+    category_rank_new = rank_index.category_rank(user_main, u_cat)
 
     # ---------------------------
     # DISPLAY RANK
@@ -219,46 +142,59 @@ elif st.session_state.page == "Predictor":
     st.divider()
 
     # ---------------------------
-    # POST PREDICTION
+    # BONUS SIMULATION (INCREMENTAL RE-ALLOCATION)
     # ---------------------------
-    st.subheader("🎯 Predicted Posts (Based on Rank & Vacancies)")
+    st.subheader("🎯 Simulated Allotment (with Bonus Marks)")
 
-    predicted_posts = []
+    # the base allocation is shared and cached; only the posts you could
+    # displace are re-allocated when your marks change
+    base_allocation = load_allocation(OVERALL_FILE, STAT_FILE)
+    sim_allocation, sim_post = insert_candidate(base_allocation, user_main, user_stat, u_cat)
 
-    for _, row in df_vac.iterrows():
-    # 1 & 2: get vacancy safely
-        vacancy_count = row[u_cat] if u_cat in row else 0
+    if sim_post is None:
+        st.warning("⚠️ With these marks you are not allotted any post in the simulation.")
+    else:
+        post_row = sim_allocation.cutoffs.set_index("Post").loc[sim_post]
+        b_min, c_min = qualifying_rule(u_cat)
+        if u_comp + bonus_comp < (c_min if post_row["IsCPT"] else b_min):
+            st.warning(f"⚠️ You would get {sim_post}, but your Computer marks are below the qualifying marks.")
+        else:
+            st.success(f"✅ Simulated allotment: {sim_post} ({post_row['Pay Level']})")
 
-        if vacancy_count <= 0:
-            continue
+    with st.expander("Post-wise cutoffs after adding you"):
+        st.dataframe(sim_allocation.cutoffs.drop(columns=["IsCPT", "IsStat"]), use_container_width=True)
 
-    is_stat_post = str(row.get("Is_Stat_Post", "")).strip().lower() in ["true", "yes", "1"]
-    user_rank = stat_rank_new if is_stat_post else category_rank_new
+    st.divider()
 
-    if user_rank <= vacancy_count:
-        predicted_posts.append({
-            "Department": row.get("Department", "N/A"),
-            "Post Name": row.get("Post Name", "N/A"),
-            "Your Rank": user_rank,
-            f"{u_cat} Vacancies": vacancy_count,
-            "Post Type": "Statistics Post" if is_stat_post else "Normal Post"
-        })
+    # ---------------------------
+    # POST PREDICTION
+    # ---------------------------
+    st.subheader("🎯 Predicted Posts (Based on Rank & Vacancies)")
+
+    # statistics posts go by the Statistics rank, the rest by category rank
+    user_rank = posts["IsStat"].map({True: stat_rank_new, False: category_rank_new})
+    eligible = (posts[u_cat] > 0) & (user_rank <= posts[u_cat])
+
+    result_df = pd.DataFrame({
+        "Department": posts["Department"],
+        "Post Name": posts["Post Name"],
+        "Your Rank": user_rank,
+        f"{u_cat} Vacancies": posts[u_cat],
+        "Post Type": posts["IsStat"].map({True: "Statistics Post", False: "Normal Post"}),
+    })[eligible].reset_index(drop=True)
 
     # ---------------------------
     # SHOW RESULTS
     # ---------------------------
-    if predicted_posts:
-
-        result_df = pd.DataFrame(predicted_posts)
+    if not result_df.empty:
 
         st.success("✅ Based on your rank, you are eligible for the following posts:")
         st.dataframe(result_df, use_container_width=True)
 
-        pdf_file = generate_pdf(result_df)
-
+        # the PDF is only built when the button is clicked
         st.download_button(
             label="⬇️ Download Prediction Report (PDF)",
-            data=pdf_file,
+            data=lambda: generate_pdf(result_df, title="SSC CGL 2025 Category Prediction Report"),
             file_name="SSC_CGL_2025_Prediction_Report.pdf",
             mime="application/pdf"
         )
@@ -269,12 +205,50 @@ elif st.session_state.page == "Predictor":
     st.divider()
 
     st.subheader("📋 Full Vacancy Table")
-    st.dataframe(df_vac, use_container_width=True)
+    st.dataframe(posts.drop(columns=["PayLevelNum"]), use_container_width=True, hide_index=True)
 
 
 # =====================================================
 # ANALYTICS PAGE
 # =====================================================
+elif st.session_state.page == "Analytics":
+
+    st.header("📈 Main Paper Score Distribution")
+
+    # precomputed half-mark histograms: no pass over the candidates per rerun
+    dist = load_score_distribution(
+        "CSV - SSC CGL Mains 2025 Marks List.xlsx - in.csv",
+        "CSV - SSC CGL Mains 2025 Statistics Paper Marks List (1).csv",
+    )
+
+    if dist is None:
+        st.error("❌ Marks list not found in project folder.")
+        st.stop()
+
+    density = dist.histogram("main", by="Category")
+    st.line_chart(density[density.sum(axis=1) > 0])
+
+    a_marks = st.number_input("Candidates scoring at least", 0.0, 390.0, 300.0, step=0.5)
+    a_cat = st.selectbox("Category", ["All", "UR", "OBC", "EWS", "SC", "ST"])
+    count = dist.count_at_least("main", a_marks, category=None if a_cat == "All" else a_cat)
+    st.metric(f"{a_cat} candidates with {a_marks:g}+ marks", count)
+
+    st.caption("Percentile curves, state-wise filters and cutoff trends are on the Analytics page in the sidebar.")
+
+
+# =====================================================
+# DEBUG PANEL
+# =====================================================
+if debug:
+    st.divider()
+    st.subheader("🛠️ Stage Timings (this rerun)")
+    timings = pd.DataFrame(profile_records())
+    if timings.empty:
+        st.info("No stage ran in this rerun; everything came from the cache.")
+    else:
+        st.dataframe(timings, use_container_width=True, hide_index=True)
+    with st.expander("All sessions (profile log)"):
+        st.dataframe(summarize_profile_log(), use_container_width=True, hide_index=True)
 
 
 
@@ -0,0 +1,240 @@
+"""JSON prediction API over the engine, for partner sites and other machine clients.
+
+A small asyncio HTTP/1.1 server (standard library only, keep-alive)::
+
+    python -m core serve --port 8080
+
+    GET  /health
+    GET  /rank?marks=321&category=OBC[&stat_marks=96.5]
+    GET  /cutoffs[?method=preference&horizontal=1]
+    GET  /predict?marks=321&comp=25&category=OBC[&stat_marks=96.5&method=...&horizontal=1]
+    POST /batch   {"profiles": [{"Main Paper Marks": 321, "Computer Marks": 25, "Category": "OBC"}],
+                   "method": "pay_level", "horizontal": false}
+
+Engine calls run off the event loop (and on the engine's bounded pool for
+the heavy ones); responses are cached on the request and the dataset
+version, so a data update is never served stale.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+
+from core import engine
+
+RESPONSE_CACHE_SIZE = 4096
+MAX_BODY = 4 * 2 ** 20
+METHODS = ('pay_level', 'preference')
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(params, name, default=None):
+    if name not in params:
+        if default is None:
+            raise RequestError(400, f"missing parameter '{name}'")
+        return default
+    try:
+        value = float(params[name])
+    except ValueError:
+        raise RequestError(400, f"'{name}' must be a number") from None
+    if not math.isfinite(value):
+        raise RequestError(400, f"'{name}' must be a finite number")
+    return value
+
+
+def _options(params):
+    method = params.get('method', 'pay_level')
+    if method not in METHODS:
+        raise RequestError(400, f"'method' must be one of {', '.join(METHODS)}")
+    horizontal = str(params.get('horizontal', '')).lower() in ('1', 'true', 'yes')
+    return method, horizontal
+
+
+def _category(params):
+    category = str(params.get('category', '')).strip().upper()
+    if category not in engine.CUTOFF_CATEGORIES:
+        raise RequestError(400, f"'category' must be one of {', '.join(engine.CUTOFF_CATEGORIES)}")
+    return category
+
+
+def _records(df):
+    # to_json writes NaN as null
+    return json.loads(df.to_json(orient='records', force_ascii=False))
+
+
+class PredictionAPI:
+    """Request handling for one pair of marks lists; see the module docstring."""
+
+    def __init__(self, main_file, stat_file, cache_size=RESPONSE_CACHE_SIZE):
+        self.main_file = main_file
+        self.stat_file = stat_file
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- endpoints (run in a worker thread) ---
+    def rank(self, params, body):
+        marks, category = _number(params, 'marks'), _category(params)
+        stat_marks = _number(params, 'stat_marks', 0.0)
+        index = engine.load_rank_index(self.main_file, self.stat_file)
+        if index is None:
+            raise RequestError(500, "marks list not found")
+        return {
+            'overall_rank': int(index.overall_rank(marks)),
+            'category_rank': int(index.category_rank(marks, category)),
+            'stat_rank': int(index.stat_rank(marks + stat_marks)) if stat_marks else None,
+        }
+
+    def cutoffs(self, params, body):
+        return _records(self._cutoff_table(*_options(params)))
+
+    def predict(self, params, body):
+        marks, comp, category = _number(params, 'marks'), _number(params, 'comp'), _category(params)
+        stat_marks = _number(params, 'stat_marks', 0.0)
+        cutoffs = self._cutoff_table(*_options(params))
+        chances = engine.predict_chances(cutoffs, marks, stat_marks, comp, category,
+                                         engine.qualifying_rule(category))
+        return [{'Post': post, 'Pay Level': level, 'Prediction': chance}
+                for post, level, chance in zip(cutoffs['Post'], cutoffs['Pay Level'], chances)]
+
+    def batch(self, params, body):
+        if not isinstance(body, dict) or not isinstance(body.get('profiles'), list):
+            raise RequestError(400, "expected a JSON object with a 'profiles' list")
+        cutoffs = self._cutoff_table(*_options(body))
+        if not body['profiles']:
+            return []
+        try:
+            out = engine.predict_batch(cutoffs, pd.DataFrame(body['profiles']),
+                                       engine.load_rank_index(self.main_file, self.stat_file))
+        except ValueError as err:
+            raise RequestError(400, str(err)) from None
+        return _records(out)
+
+    def health(self, params, body):
+        return {'status': 'ok', 'version': self.version()}
+
+    ROUTES = {
+        ('GET', '/health'): health,
+        ('GET', '/rank'): rank,
+        ('GET', '/cutoffs'): cutoffs,
+        ('GET', '/predict'): predict,
+        ('POST', '/batch'): batch,
+    }
+
+    def _cutoff_table(self, method, horizontal):
+        cutoffs = engine.load_cutoff_table(self.main_file, self.stat_file, method, horizontal)
+        if cutoffs is None:
+            raise RequestError(500, "marks list not found")
+        return cutoffs
+
+    def version(self):
+        return engine.cutoff_table_version(self.main_file, self.stat_file)
+
+    # --- response cache ---
+    def respond(self, verb, target, body):
+        """``(status, json bytes)`` for one request, from the cache when possible."""
+        url = urlsplit(target)
+        handler = self.ROUTES.get((verb, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.ROUTES):
+                return 405, _error(f"{verb} not allowed on {url.path}")
+            return 404, _error(f"no endpoint {url.path}")
+        params = dict(parse_qsl(url.query))
+        cacheable = url.path != '/health'
+        if cacheable:
+            # the dataset version covers every file the answers depend on
+            key = (url.path, tuple(sorted(params.items())), hashlib.sha1(body).hexdigest(), self.version())
+            with self._lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    return self._cache[key]
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            return 400, _error("body is not valid JSON")
+        try:
+            response = 200, json.dumps(handler(self, params, payload), ensure_ascii=False).encode()
+        except RequestError as err:
+            response = err.status, _error(str(err))
+        if cacheable and response[0] < 500:
+            with self._lock:
+                self._cache[key] = response
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return response
+
+    # --- HTTP ---
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin1').split('\r\n')
+                try:
+                    verb, target, protocol = lines[0].split(' ', 2)
+                except ValueError:
+                    await _send(writer, 400, _error("malformed request line"), False)
+                    break
+                headers = {k.strip().lower(): v.strip() for k, _, v in (h.partition(':') for h in lines[1:] if h)}
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and protocol.upper() == 'HTTP/1.1')
+                length = headers.get('content-length', '0')
+                length = int(length) if length.isdigit() else -1
+                if length < 0:
+                    await _send(writer, 400, _error("bad Content-Length"), False)
+                    break
+                if length > MAX_BODY:
+                    await _send(writer, 413, _error("request body too large"), False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = await asyncio.to_thread(self.respond, verb.upper(), target, body)
+                except Exception as err:
+                    status, payload = 500, _error(f"{type(err).__name__}: {err}")
+                await _send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _error(message):
+    return json.dumps({'error': message}).encode()
+
+
+async def _send(writer, status, payload, keep_alive):
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+
+
+async def serve(main_file, stat_file, host='127.0.0.1', port=8080):
+    """Serve the API until cancelled."""
+    api = PredictionAPI(main_file, stat_file)
+    # load the shared tables before taking traffic
+    await asyncio.to_thread(api.respond, 'GET', '/cutoffs', b'')
+    await asyncio.to_thread(engine.load_rank_index, main_file, stat_file)
+    server = await asyncio.start_server(api.handle, host, port, backlog=1024)
+    print(f"serving on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
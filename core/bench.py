@@ -0,0 +1,195 @@
+"""Benchmarks for the load, join, allocation, report, rank and distribution paths.
+
+Synthetic Main and Statistics marks lists are generated with the category
+mix and per-category score distributions of the published Statistics list,
+written as CSVs in the layout the app reads, and every stage is timed on
+them. Results are JSON so runs on different commits can be compared::
+
+    python -m core bench --sizes 50000 200000 --out bench.json
+    python -m core bench --sizes 50000 --compare bench.json
+"""
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import engine
+
+STAT_FILE = "CSV - SSC CGL Mains 2025 Statistics Paper Marks List (1).csv"
+DEFAULT_SIZES = [50_000, 200_000, 1_000_000]
+# share of the Main list that also wrote the Statistics paper
+STAT_SHARE = 0.05
+# the Main list is wider than the Statistics list, which only holds the top
+MAIN_SPREAD = 1.8
+
+
+def fit_profile(file_name=STAT_FILE):
+    """Category mix and score distributions of a marks list, for :func:`synthetic_marks`."""
+    df = pd.read_csv(file_name, encoding='latin1', on_bad_lines='skip')
+    df.columns = [str(c).strip() for c in df.columns]
+    marks = {c: pd.to_numeric(df[c], errors='coerce') for c in
+             ['Main Paper Marks', 'Statistics Marks', 'Computer Marks']}
+    by_cat = pd.DataFrame(marks).groupby(df['Category'])
+    return {
+        'category': df['Category'].value_counts(normalize=True).to_dict(),
+        'category_2': df['Category-2'].value_counts(normalize=True).to_dict(),
+        'gender': df['Gender'].value_counts(normalize=True).to_dict(),
+        'states': sorted(df['State'].dropna().unique().tolist()),
+        'mean': by_cat.mean().to_dict('index'),
+        'std': by_cat.std().to_dict('index'),
+    }
+
+
+def _masked(rng, n, head, tail, stars, alphabet):
+    """Masked identifiers like the published ones ('6******469', 'JAY***RMA')."""
+    chars = np.array(list(alphabet))
+    left = [''.join(r) for r in chars[rng.integers(0, len(chars), (n, head))]]
+    right = [''.join(r) for r in chars[rng.integers(0, len(chars), (n, tail))]]
+    return [f"{a}{'*' * stars}{b}" for a, b in zip(left, right)]
+
+
+def _choice(rng, dist, n):
+    keys = list(dist)
+    p = np.array([dist[k] for k in keys], dtype=float)
+    return np.array(keys, dtype=object)[rng.choice(len(keys), n, p=p / p.sum())]
+
+
+def synthetic_marks(n, profile, seed=0, stat_share=STAT_SHARE):
+    """A Main marks list of ``n`` candidates and the Statistics list of those who sat it."""
+    rng = np.random.default_rng(seed)
+    cats = _choice(rng, profile['category'], n)
+    mean = {c: profile['mean'][c] for c in profile['mean']}
+    std = {c: profile['std'][c] for c in profile['std']}
+
+    def draw(col, lo, hi, spread=1.0, shift=0.0):
+        mu = np.array([mean[c][col] for c in cats]) - shift
+        sd = np.array([std[c][col] for c in cats]) * spread
+        return np.clip(np.round(rng.normal(mu, sd) * 2) / 2, lo, hi)
+
+    main = np.round(draw('Main Paper Marks', 0, 390, MAIN_SPREAD, shift=40))
+    computer = np.round(draw('Computer Marks', 0, 60))
+    appeared = rng.random(n) < stat_share
+    stat = np.where(appeared, draw('Statistics Marks', 0, 200), np.nan)
+    pass_b, _ = engine.computer_pass_flags(cats, computer)
+
+    df = pd.DataFrame({
+        'SN.': [f"{i}." for i in range(1, n + 1)],
+        'Name': _masked(rng, n, 3, 3, 3, 'ABCDEFGHIJKLMNOPRSTUVY'),
+        'Roll Number': _masked(rng, n, 1, 3, 6, '0123456789'),
+        'Category': cats,
+        'Category-2': _choice(rng, profile['category_2'], n),
+        'Gender': _choice(rng, profile['gender'], n),
+        'State': np.array(profile['states'], dtype=object)[rng.integers(0, len(profile['states']), n)],
+        'Statistics Marks': stat,
+        'Main Paper Marks': main,
+        'Statistics + Main(Without Computer)': main + np.nan_to_num(stat),
+        'Computer Marks': computer,
+        'Status': np.where(pass_b, 'Qualified', 'Failed'),
+    })
+    df = df.sort_values('Main Paper Marks', ascending=False, kind='stable').reset_index(drop=True)
+    return df.drop(columns='Statistics Marks'), df[df['Statistics Marks'].notna()].reset_index(drop=True)
+
+
+def write_synthetic(directory, n, profile, seed=0):
+    """Write the synthetic Main and Statistics CSVs; returns their paths."""
+    main, stat = synthetic_marks(n, profile, seed)
+    main_file = os.path.join(directory, f"main_{n}.csv")
+    stat_file = os.path.join(directory, f"stat_{n}.csv")
+    main.to_csv(main_file, index=False)
+    stat.to_csv(stat_file, index=False)
+    return main_file, stat_file
+
+
+def _time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_size(n, profile, repeat=3, seed=0, lookups=10_000):
+    """Time every stage on ``n`` synthetic candidates; returns {stage: [seconds, ...]}."""
+    from core.report import build_pdf
+
+    with tempfile.TemporaryDirectory() as directory:
+        main_file, stat_file = write_synthetic(directory, n, profile, seed)
+        posts = engine.get_posts_df()
+
+        def load():
+            engine._load_stat_data.cache_clear()
+            return engine.load_and_clean_data(main_file), engine.load_stat_data(stat_file)
+
+        times = {'load': _time(load, repeat)}
+        (df_main, main_key), (df_stat, stat_key) = load()
+        times['join'] = _time(lambda: engine.join_stat_marks(df_main, main_key, df_stat, stat_key), repeat)
+        pool = engine.build_candidate_pool(df_main, main_key, df_stat, stat_key)
+        times['store'] = _time(lambda: engine.build_candidate_store(pool, main_key), repeat)
+        store = engine.build_candidate_store(pool, main_key)
+        times['score_distribution'] = _time(lambda: engine.build_score_distribution(store), repeat)
+
+        scores = {'Main Paper Marks': store.main, 'Total_Stat_Marks': store.total}
+        times['sort'] = _time(lambda: engine._build_state(scores, store.cat, store.rolls, posts), repeat)
+        times['allocate_pay_level'] = _time(lambda: engine.allocate_posts(store, posts), repeat)
+        times['allocate_preference'] = _time(lambda: engine.allocate_by_preference(store, posts), repeat)
+        times['allocate_horizontal'] = _time(lambda: engine.allocate_posts(store, posts, horizontal=True), repeat)
+        result = engine.allocate_posts(store, posts)
+        times['insert_candidate'] = _time(lambda: engine.insert_candidate(result, 320, 0, 'OBC'), repeat)
+        times['pdf'] = _time(lambda: build_pdf(result.cutoffs, "Benchmark"), repeat)
+
+        times['rank_index'] = _time(lambda: engine.build_rank_index(store), repeat)
+        index = engine.build_rank_index(store)
+        marks = np.random.default_rng(seed).uniform(0, 390, lookups)
+        times[f'rank_lookup_{lookups}'] = _time(lambda: index.overall_rank(marks), repeat)
+    return times
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(sizes=None, repeat=3, seed=0, profile_file=STAT_FILE):
+    """Benchmark every size; returns a JSON-ready dict."""
+    profile = fit_profile(profile_file)
+    results = []
+    for n in sizes or DEFAULT_SIZES:
+        for stage, times in bench_size(n, profile, repeat, seed).items():
+            results.append({'size': n, 'stage': stage, 'best': min(times),
+                            'median': float(np.median(times)), 'times': times})
+    return {
+        'meta': {
+            'commit': _commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'cpus': os.cpu_count(),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare(new, old):
+    """Best-time ratio new/old per (size, stage) present in both runs."""
+    before = {(r['size'], r['stage']): r['best'] for r in old['results']}
+    rows = [{'size': r['size'], 'stage': r['stage'], 'old': before[r['size'], r['stage']], 'new': r['best'],
+             'ratio': r['best'] / before[r['size'], r['stage']] if before[r['size'], r['stage']] else np.nan}
+            for r in new['results'] if (r['size'], r['stage']) in before]
+    return pd.DataFrame(rows)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
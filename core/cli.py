@@ -0,0 +1,330 @@
+"""Command line entry point: ``python -m core <command> ...``.
+
+Runs the same engine as the Streamlit pages without starting Streamlit,
+e.g. for cron jobs and benchmarks::
+
+    python -m core cutoffs --out cutoffs.csv
+    python -m core rank --marks 321 --stat-marks 96.5 --category OBC
+    python -m core batch profiles.csv --out predictions.xlsx
+    python -m core snapshot vacancy_data.csv
+    python -m core join
+    python -m core check-import --budget 1500
+    python -m core bench --sizes 50000 --out bench.json
+    python -m core serve --port 8080
+    python -m core loadtest --concurrency 32 --requests 5000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from core import engine, history
+
+MAIN_FILE = "CSV - SSC CGL Mains 2025 Marks List.xlsx - in.csv"
+STAT_FILE = "CSV - SSC CGL Mains 2025 Statistics Paper Marks List (1).csv"
+
+# cold-import budget for the modules every page session loads, and the
+# heavy optional dependencies that must only be imported on first use
+IMPORT_BUDGET_MS = 1500
+IMPORT_MODULES = ('core.engine', 'core.report')
+LAZY_MODULES = ('sklearn', 'reportlab', 'openpyxl', 'streamlit')
+
+
+def write_table(df, out, title=None):
+    """Write ``df`` to ``out`` by extension (.csv/.json/.xlsx/.pdf), or CSV to stdout."""
+    if not out or out == '-':
+        df.to_csv(sys.stdout, index=False)
+        return
+    ext = os.path.splitext(out)[1].lower()
+    if ext == '.json':
+        df.to_json(out, orient='records', indent=2, force_ascii=False)
+    elif ext == '.xlsx':
+        df.to_excel(out, index=False)
+    elif ext == '.pdf':
+        from core.report import generate_pdf
+        with open(out, 'wb') as f:
+            f.write(generate_pdf(df, title=title))
+    else:
+        df.to_csv(out, index=False)
+
+
+def _cutoffs(args):
+    cutoffs = engine.load_cutoff_table(args.main, args.stat, args.method, args.horizontal)
+    if cutoffs is None:
+        sys.exit(f"error: marks list '{args.main}' not found")
+    return cutoffs
+
+
+def cmd_cutoffs(args):
+    write_table(_cutoffs(args), args.out, title="SSC CGL 2025 Post-wise Cutoffs")
+
+
+def cmd_rank(args):
+    index = engine.load_rank_index(args.main, args.stat)
+    if index is None:
+        sys.exit(f"error: marks list '{args.main}' not found")
+    ranks = {
+        'overall_rank': index.overall_rank(args.marks),
+        'category_rank': index.category_rank(args.marks, args.category),
+        'stat_rank': index.stat_rank(args.marks + args.stat_marks) if args.stat_marks else None,
+    }
+    json.dump(ranks, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+def cmd_batch(args):
+    cutoffs = _cutoffs(args)
+    if args.profiles.lower().endswith('.xlsx'):
+        profiles = pd.read_excel(args.profiles)
+    else:
+        profiles = pd.read_csv(args.profiles)
+    try:
+        out = engine.predict_batch(cutoffs, profiles, engine.load_rank_index(args.main, args.stat))
+    except ValueError as err:
+        sys.exit(f"error: {err}")
+    write_table(out, args.out, title="SSC CGL 2025 Batch Prediction")
+
+
+def cmd_snapshot(args):
+    for file_name in args.files:
+        print(engine.convert_to_snapshot(file_name))
+
+
+def cmd_join(args):
+    try:
+        path, report = engine.convert_pool_snapshot(args.main, args.stat)
+    except FileNotFoundError as err:
+        sys.exit(f"error: marks list '{err}' not found")
+    print(report.summary())
+    for side, dups in (('Main', report.main_duplicates), ('Statistics', report.stat_duplicates)):
+        if len(dups):
+            print(f"\nduplicate keys in the {side} list:")
+            print(dups.to_string())
+    print(path)
+
+
+def cmd_train(args):
+    if args.history:
+        frame, source = pd.read_csv(args.history), args.history
+    else:
+        with history.connect(args.db) as conn:
+            frame, source = history.training_frame(conn), args.db
+    missing = [c for c in ['Category', 'Vacancies', 'Avg_Marks', 'Final_Cutoff'] if c not in frame.columns]
+    if missing:
+        sys.exit(f"error: {source} is missing columns: {', '.join(missing)}")
+    if frame.empty:
+        sys.exit(f"error: {source} has no complete training rows")
+    model = engine.train_cutoff_model(frame)
+    print(engine.save_cutoff_model(model, args.out))
+
+
+def cmd_history_import(args):
+    conn = history.connect(args.db)
+    for file_name in args.files:
+        try:
+            print(f"{file_name}: {history.import_csv(conn, file_name, args.year)} rows")
+        except (ValueError, KeyError) as err:
+            sys.exit(f"error: {file_name}: {err}")
+
+
+def cmd_history_record(args):
+    cutoffs = _cutoffs(args)
+    store = engine.load_candidate_store(args.main, args.stat)
+    conn = history.connect(args.db)
+    n = history.record_allocation(conn, cutoffs, args.year, engine.get_posts_df(),
+                                  float(store.main.mean()))
+    print(f"{args.year}: {n} rows")
+
+
+def cmd_history_trend(args):
+    conn = history.connect(args.db)
+    write_table(history.trend(conn, args.post, args.category, args.pay_level), args.out)
+
+
+def cmd_forecast(args):
+    model = engine.load_cutoff_model(args.model)
+    if model is None:
+        sys.exit(f"error: no model at '{args.model}'; run 'python -m core train' first")
+    out = engine.predict_cutoffs(model, engine.get_posts_df(), args.avg_marks)
+    write_table(out, args.out, title="SSC CGL Predicted Cutoffs")
+
+
+def cmd_bench(args):
+    from core import bench
+    results = bench.run(args.sizes, args.repeat, args.seed)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+    table = pd.DataFrame(results['results'])[['size', 'stage', 'best', 'median']]
+    print(table.to_string(index=False, float_format=lambda t: f"{t:.4f}"))
+    if args.compare:
+        print()
+        print(bench.compare(results, bench.load_results(args.compare)).to_string(
+            index=False, float_format=lambda t: f"{t:.4f}"))
+
+
+def cmd_profile(args):
+    summary = engine.summarize_profile_log(args.log)
+    if summary.empty:
+        print(f"no stage records in {args.log or engine.PROFILE_LOG}")
+        return
+    write_table(summary, args.out, title="Stage Profile")
+
+
+def cmd_serve(args):
+    import asyncio
+    from core import api
+    try:
+        asyncio.run(api.serve(args.main, args.stat, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_loadtest(args):
+    from core import loadtest
+    try:
+        summary = loadtest.run(args.url, args.requests, args.concurrency, args.seed, args.warmup)
+    except OSError as err:
+        sys.exit(f"error: cannot reach {args.url}: {err}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(summary, f, indent=2)
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+def import_profile(modules=IMPORT_MODULES):
+    """Import ``modules`` in a fresh interpreter; return (milliseconds, loaded top-level packages)."""
+    code = (
+        "import sys, time; t = time.perf_counter()\n"
+        + "".join(f"import {m}\n" for m in modules)
+        + "print((time.perf_counter() - t) * 1000); print(' '.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    )
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.splitlines()
+    return float(out[0]), set(out[1].split())
+
+
+def cmd_check_import(args):
+    elapsed, loaded = min((import_profile() for _ in range(args.repeat)), key=lambda r: r[0])
+    eager = sorted(loaded.intersection(LAZY_MODULES))
+    print(f"import {', '.join(IMPORT_MODULES)}: {elapsed:.0f} ms (budget {args.budget} ms)")
+    if eager:
+        print(f"eagerly imported: {', '.join(eager)}")
+    if elapsed > args.budget or eager:
+        sys.exit(1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m core', description="SSC CGL cutoff and rank engine")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def data_args(p):
+        p.add_argument('--main', default=MAIN_FILE, help="Mains marks list (CSV or snapshot source)")
+        p.add_argument('--stat', default=STAT_FILE, help="Statistics marks list")
+        p.add_argument('--method', choices=['pay_level', 'preference'], default='pay_level')
+        p.add_argument('--horizontal', action='store_true', help="apply the ESM/PwD reservation")
+
+    p = sub.add_parser('cutoffs', help="post-wise cutoff table")
+    data_args(p)
+    p.add_argument('--out', help="output file (.csv, .json, .xlsx, .pdf); default stdout")
+    p.set_defaults(func=cmd_cutoffs)
+
+    p = sub.add_parser('rank', help="rank lookup for one set of marks")
+    data_args(p)
+    p.add_argument('--marks', type=float, required=True, help="Main paper marks")
+    p.add_argument('--stat-marks', type=float, default=0.0, help="Statistics marks")
+    p.add_argument('--category', default='UR', choices=['UR', 'OBC', 'EWS', 'SC', 'ST'])
+    p.set_defaults(func=cmd_rank)
+
+    p = sub.add_parser('batch', help="predictions for a CSV/XLSX of candidate profiles")
+    data_args(p)
+    p.add_argument('profiles')
+    p.add_argument('--out', help="output file (.csv, .json, .xlsx, .pdf); default stdout")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser('snapshot', help="convert marks/vacancy CSVs to Feather snapshots")
+    p.add_argument('files', nargs='+')
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser('join', help="join the Statistics marks onto the Main list once and snapshot the pool")
+    data_args(p)
+    p.set_defaults(func=cmd_join)
+
+    p = sub.add_parser('train', help="train the cutoff model on historical cutoffs and save it")
+    p.add_argument('history', nargs='?', help="CSV with Category, Vacancies, Avg_Marks, Final_Cutoff "
+                                              "(default: the history database)")
+    p.add_argument('--db', default=history.HISTORY_DB)
+    p.add_argument('--out', default=engine.MODEL_FILE)
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser('history', help="historical cutoff store")
+    hist = p.add_subparsers(dest='action', required=True)
+    p = hist.add_parser('import', help="bulk-import yearly cutoff CSVs")
+    p.add_argument('files', nargs='+')
+    p.add_argument('--year', type=int, help="year of the files (default: taken from the file name)")
+    p.add_argument('--db', default=history.HISTORY_DB)
+    p.set_defaults(func=cmd_history_import)
+    p = hist.add_parser('record', help="store this year's computed cutoffs")
+    data_args(p)
+    p.add_argument('--year', type=int, required=True)
+    p.add_argument('--db', default=history.HISTORY_DB)
+    p.set_defaults(func=cmd_history_record)
+    p = hist.add_parser('trend', help="cutoffs across years")
+    p.add_argument('--post')
+    p.add_argument('--category', choices=history.CATEGORIES)
+    p.add_argument('--pay-level')
+    p.add_argument('--db', default=history.HISTORY_DB)
+    p.add_argument('--out', help="output file (.csv, .json, .xlsx, .pdf); default stdout")
+    p.set_defaults(func=cmd_history_trend)
+
+    p = sub.add_parser('forecast', help="model-predicted cutoffs for every post and category")
+    p.add_argument('--model', default=engine.MODEL_FILE)
+    p.add_argument('--avg-marks', type=float, required=True, help="expected average marks")
+    p.add_argument('--out', help="output file (.csv, .json, .xlsx, .pdf); default stdout")
+    p.set_defaults(func=cmd_forecast)
+
+    p = sub.add_parser('bench', help="time each stage on synthetic marks lists")
+    p.add_argument('--sizes', type=int, nargs='+', help="candidate counts (default 50k, 200k, 1M)")
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--out', help="write the results as JSON")
+    p.add_argument('--compare', help="JSON from an earlier run to compare against")
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser('profile', help="aggregate the stage profile log (CUTOFF_PROFILE=1) by stage")
+    p.add_argument('--log', help=f"profile log (default {engine.PROFILE_LOG})")
+    p.add_argument('--out', help="output file (.csv, .json, .xlsx, .pdf); default stdout")
+    p.set_defaults(func=cmd_profile)
+
+    p = sub.add_parser('serve', help="JSON prediction API (see core/api.py)")
+    data_args(p)
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8080)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser('loadtest', help="latency and throughput of a running API instance")
+    p.add_argument('--url', default='http://127.0.0.1:8080')
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--concurrency', type=int, default=16, help="open connections")
+    p.add_argument('--warmup', type=int, default=100, help="unmeasured requests sent first")
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--out', help="also write the summary as JSON")
+    p.set_defaults(func=cmd_loadtest)
+
+    p = sub.add_parser('check-import', help="fail if importing the engine is slow or pulls in heavy packages")
+    p.add_argument('--budget', type=float, default=IMPORT_BUDGET_MS, help="milliseconds")
+    p.add_argument('--repeat', type=int, default=3, help="best of N cold imports")
+    p.set_defaults(func=cmd_check_import)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
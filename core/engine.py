@@ -1,54 +1,530 @@
-import streamlit as st
 import pandas as pd
 import numpy as np
 import os
-import io
+import json
+import time
+import hashlib
+import functools
+import threading
+import tracemalloc
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+# --- STAGE PROFILING ---
+# Opt-in wall time, rows processed and peak memory per expensive stage.
+# CUTOFF_PROFILE=1 profiles every session (=memory also traces allocations
+# with tracemalloc while any stage runs); start_profile(True) profiles only
+# the current script run, which is what the debug panels use. Records of
+# the running thread feed the panels and every record is appended to
+# PROFILE_LOG as a JSON line, so hot stages can be aggregated across
+# sessions with summarize_profile_log. Disabled, a stage costs one check.
+PROFILE_LOG = os.environ.get('CUTOFF_PROFILE_LOG', 'stage_profile.log')
+_PROFILE_MODE = os.environ.get('CUTOFF_PROFILE', '').strip().lower()
+_profile_all = _PROFILE_MODE not in ('', '0', 'false', 'no')
+_profile_memory = _PROFILE_MODE == 'memory'
+_profile_local = threading.local()
+_profile_log_lock = threading.Lock()
+# tracemalloc is process-wide: stages running at the same time (nested or
+# in other sessions) share one trace, started by the first and stopped by
+# the last, so a stage's peak includes every thread's allocations
+_memory_lock = threading.Lock()
+_memory_stages = 0
+
+
+def start_profile(enabled=False):
+    """Start a fresh list of stage records for the current thread (one script run).
+
+    ``enabled`` profiles this thread even when CUTOFF_PROFILE is not set.
+    """
+    _profile_local.records = []
+    _profile_local.stack = []
+    _profile_local.enabled = enabled
+
+
+def profile_records():
+    """Stage records of the current thread since :func:`start_profile`, in start order."""
+    return list(getattr(_profile_local, 'records', []))
+
+
+def profiling():
+    return _profile_all or getattr(_profile_local, 'enabled', False)
+
+
+def _log_stage(record):
+    if not PROFILE_LOG:
+        return
+    line = json.dumps({'time': round(time.time(), 3), 'pid': os.getpid(), **record})
+    with _profile_log_lock:
+        try:
+            with open(PROFILE_LOG, 'a') as f:
+                f.write(line + '\n')
+        except OSError:
+            pass
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Profile the enclosed block as stage ``name``.
+
+    Yields the record; set ``record['rows']`` inside the block when the
+    row count is only known there. Nested stages get a larger 'depth'.
+    With CUTOFF_PROFILE=memory, 'process_peak_mb' is the peak traced
+    memory of the whole process while the stage ran, allocations of
+    concurrent sessions included.
+    """
+    global _memory_stages
+    if not profiling():
+        yield {}
+        return
+    # only threads that called start_profile keep their records (a script
+    # run, a heavy call); any other thread, like an API or callback worker,
+    # only writes the log
+    if not hasattr(_profile_local, 'stack'):
+        _profile_local.stack = []
+    stack = _profile_local.stack
+    record = {'stage': name, 'rows': rows, 'depth': len(stack)}
+    if _profile_memory:
+        with _memory_lock:
+            if _memory_stages == 0:
+                tracemalloc.start()
+            _memory_stages += 1
+    if hasattr(_profile_local, 'records'):
+        _profile_local.records.append(record)
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        stack.pop()
+        if _profile_memory:
+            with _memory_lock:
+                record['process_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                _memory_stages -= 1
+                if _memory_stages == 0:
+                    tracemalloc.stop()
+        _log_stage(record)
+
+
+def profiled(name, rows=None):
+    """Decorator form of :func:`stage`; ``rows`` maps the call's arguments to a row count."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiling():
+                return fn(*args, **kwargs)
+            with stage(name, rows(*args, **kwargs) if rows else None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def summarize_profile_log(file_name=None):
+    """Per-stage aggregate of a profile log, slowest total first."""
+    file_name = file_name or PROFILE_LOG
+    if not file_name or not os.path.exists(file_name) or os.path.getsize(file_name) == 0:
+        return pd.DataFrame()
+    df = pd.read_json(file_name, lines=True)
+    seconds = df.groupby('stage')['seconds']
+    out = pd.DataFrame({
+        'calls': seconds.size(),
+        'total_s': seconds.sum(),
+        'mean_s': seconds.mean(),
+        'p95_s': seconds.quantile(0.95),
+        'max_s': seconds.max(),
+        'mean_rows': pd.to_numeric(df['rows'], errors='coerce').groupby(df['stage']).mean(),
+    })
+    if 'process_peak_mb' in df.columns:
+        out['max_process_peak_mb'] = df.groupby('stage')['process_peak_mb'].max()
+    return out.sort_values('total_s', ascending=False).reset_index()
+
+
+# --- SHARED REQUEST PATH ---
+# Every Streamlit session runs in its own thread of one process. The module
+# itself is the engine singleton: loaders share their results through
+# _cached (which also makes concurrent misses for the same key wait for one
+# computation), shared arrays are read-only, and the heavy operations
+# (allocation, candidate insert, Monte Carlo simulation, PDF build) run on
+# one bounded thread pool via run_heavy, so a burst of sessions queues
+# instead of oversubscribing the CPUs, and identical requests in flight
+# share one run.
+ENGINE_WORKERS = int(os.environ.get('ENGINE_WORKERS', 0)) or min(8, os.cpu_count() or 1)
+_heavy_pool = None
+_heavy_lock = threading.RLock()
+_in_flight = {}
+_on_heavy_pool = threading.local()
+
+
+class _SharedCache:
+    """LRU cache of ``fn`` whose concurrent misses for one key share a single call.
+
+    The first ``key_args`` arguments name the entry (the paths and
+    options); the rest are file signatures, and a result for new
+    signatures replaces the one for the old, so an updated file does not
+    leave its previous version pinned in memory.
+    """
+
+    def __init__(self, fn, maxsize=8, key_args=1):
+        functools.update_wrapper(self, fn)
+        self.fn = fn
+        self.maxsize = maxsize
+        self.key_args = key_args
+        self._lock = threading.Lock()
+        self._done = OrderedDict()
+        self._pending = {}
+
+    def __call__(self, *args):
+        with self._lock:
+            if args in self._done:
+                self._done.move_to_end(args)
+                return self._done[args]
+            future = self._pending.get(args)
+            owner = future is None
+            if owner:
+                future = self._pending[args] = Future()
+        if not owner:
+            return future.result()
+        try:
+            value = self.fn(*args)
+        except BaseException as err:
+            with self._lock:
+                del self._pending[args]
+            future.set_exception(err)
+            raise
+        with self._lock:
+            del self._pending[args]
+            for stale in [k for k in self._done if k[:self.key_args] == args[:self.key_args]]:
+                del self._done[stale]
+            self._done[args] = value
+            while len(self._done) > self.maxsize:
+                self._done.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def cache_clear(self):
+        with self._lock:
+            self._done.clear()
+
+
+def _heavy_executor():
+    global _heavy_pool
+    with _heavy_lock:
+        if _heavy_pool is None:
+            _heavy_pool = ThreadPoolExecutor(ENGINE_WORKERS, thread_name_prefix='engine')
+        return _heavy_pool
+
+
+def _heavy_call(fn, args, kwargs, enabled):
+    # returns the stage records with the result; run_heavy hands a copy to
+    # every session waiting on the call
+    _on_heavy_pool.active = True
+    start_profile(enabled)
+    try:
+        return fn(*args, **kwargs), _profile_local.records
+    finally:
+        _on_heavy_pool.active = False
+        del _profile_local.records
+
+
+def run_heavy(key, fn, *args, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on the bounded engine pool and wait for it.
+
+    Concurrent calls with the same hashable ``key`` share one run (None
+    never coalesces), and each of them gets the run's stage records.
+    Called from a pool thread, ``fn`` runs inline.
+    """
+    return _run_on(_heavy_executor, key, fn, args, kwargs)
+
+
+def _run_on(executor, key, fn, args, kwargs):
+    # run_heavy on the thread pool returned by ``executor()``
+    if getattr(_on_heavy_pool, 'active', False):
+        return fn(*args, **kwargs)
+    enabled = profiling()
+    # a profiled session does not wait on an unprofiled run, which keeps no records
+    key = (key, enabled) if key is not None else None
+    with _heavy_lock:
+        future = _in_flight.get(key) if key is not None else None
+        if future is None:
+            future = executor().submit(_heavy_call, fn, args, kwargs, enabled)
+            if key is not None:
+                _in_flight[key] = future
+                future.add_done_callback(lambda f: _forget_in_flight(key, f))
+    value, records = future.result()
+    if hasattr(_profile_local, 'records'):
+        _profile_local.records.extend(dict(r) for r in records)
+    return value
+
+
+def _forget_in_flight(key, future):
+    with _heavy_lock:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+
+
+def _request_key(value):
+    # plain values by value; shared objects (cached results, stores) by identity,
+    # which is stable while the call that holds them is in flight
+    if value is None or isinstance(value, (str, int, float, bool, np.number)):
+        return value
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((k, _request_key(v)) for k, v in value.items())))
+    return ('id', id(value))
+
+
+def heavy(fn=None, *, executor=None):
+    """Decorator: run calls of ``fn`` through :func:`run_heavy`, coalescing identical calls.
+
+    ``executor`` returns another bounded thread pool to queue on instead
+    of the shared engine pool.
+    """
+    if fn is None:
+        return functools.partial(heavy, executor=executor)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn.__qualname__, tuple(_request_key(a) for a in args),
+               tuple(sorted((k, _request_key(v)) for k, v in kwargs.items())))
+        return _run_on(executor or _heavy_executor, key, fn, args, kwargs)
+    return wrapper
+
+
+def _freeze(value):
+    """Make the NumPy arrays of a shared result read-only (nested dataclasses and dicts too)."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    elif hasattr(value, '__dataclass_fields__'):
+        for name in value.__dataclass_fields__:
+            _freeze(getattr(value, name))
+    return value
+
 
 # --- PART 1: DATA LOADING & CLEANING ---
-@st.cache_data
+# Loaders are cached per process (shared by every Streamlit session, and
+# usable without Streamlit) on the path plus the file signature below. Cached
+# DataFrames are shared, so callers must not modify them in place. The Main
+# marks list is the exception: it is only read to build the compact
+# CandidateStore, and everything else is derived from that.
+def _cached(fn=None, *, key_args=1):
+    """Decorator: :class:`_SharedCache` with one entry per ``key_args`` leading arguments."""
+    if fn is None:
+        return functools.partial(_cached, key_args=key_args)
+    return _SharedCache(fn, maxsize=8, key_args=key_args)
+
+
+def file_signature(file_name):
+    """Return ``(path, mtime_ns, size)`` for a file, or None if it is missing.
+
+    The loaders below are cached on this signature, so a cached DataFrame is
+    reused across reruns and sessions until the file changes on disk.
+    """
+    try:
+        info = os.stat(file_name)
+    except OSError:
+        return None
+    return (os.path.abspath(file_name), info.st_mtime_ns, info.st_size)
+
+
 def load_and_clean_data(file_name):
-    if not os.path.exists(file_name):
+    """The cleaned Main marks list and its key column; ``(None, None)`` if it is missing.
+
+    Not cached: sessions share the :func:`load_candidate_store` built from it.
+    """
+    source = _fresh_source(file_name, RULES_FILE)
+    if file_signature(source) is None:
         return None, None
-    df = pd.read_csv(file_name, encoding='latin1', on_bad_lines='skip')
-    df.columns = [str(c).strip() for c in df.columns]
+    with stage('load_marks') as record:
+        df = read_snapshot(source) if source.endswith(SNAPSHOT_EXT) else _read_marks_csv(source)
+        record['rows'] = len(df)
+    return df, _key_column(df)
+
 
-    if 'Main Paper Marks' not in df.columns:
-        df = pd.read_csv(file_name, skiprows=1, encoding='latin1')
-        df.columns = [str(c).strip() for c in df.columns]
+def _key_column(df):
+    return 'Roll Number' if 'Roll Number' in df.columns else df.columns[0]
 
-    key_col = 'Roll Number' if 'Roll Number' in df.columns else df.columns[0]
+
+# Marks lists run to several lakh rows, so they are read in chunks: each
+# chunk is cleaned and appended to preallocated typed columns, and only one
+# raw chunk is ever held next to the compact result.
+CHUNK_ROWS = 100_000
+PASS_COLS = ['Pass_B', 'Pass_C']
+
+
+def _clean_marks(df):
+    """Coerce the marks, normalise categories, drop unusable rows and add the pass flags."""
+    df.columns = [str(c).strip() for c in df.columns]
     df['Main Paper Marks'] = pd.to_numeric(df['Main Paper Marks'], errors='coerce')
     df['Computer Marks'] = pd.to_numeric(df['Computer Marks'], errors='coerce')
+    df['Category'] = df['Category'].astype(str).str.strip().str.upper()
     df = df.dropna(subset=['Main Paper Marks', 'Category', 'Computer Marks'])
+    df['Pass_B'], df['Pass_C'] = computer_pass_flags(df['Category'], df['Computer Marks'])
+    return df
 
-    rules = {'UR': (18, 27), 'OBC': (15, 24), 'EWS': (15, 24), 'SC': (12, 21), 'ST': (12, 21)}
-    def get_pass_status(row):
-        b, c = rules.get(row['Category'], (12, 21))
-        return pd.Series([row['Computer Marks'] >= b, row['Computer Marks'] >= c])
-    df[['Pass_B', 'Pass_C']] = df.apply(get_pass_status, axis=1)
-    return df, key_col
-import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-import streamlit as st
 
-@st.cache_resource
-def train_cutoff_model(df):
+def iter_marks_chunks(file_name, chunksize=CHUNK_ROWS):
+    """Cleaned chunks of a marks list CSV (some lists have a title row above the header)."""
+    header = [str(c).strip() for c in pd.read_csv(file_name, encoding='latin1', nrows=0).columns]
+    skip = 0 if 'Main Paper Marks' in header else 1
+    with pd.read_csv(file_name, encoding='latin1', on_bad_lines='skip', skiprows=skip,
+                     chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield _clean_marks(chunk)
+
+
+def _count_rows(file_name, block=1 << 20):
+    """Upper bound on the data rows of a CSV (its newline count), read in blocks."""
+    n = 1
+    with open(file_name, 'rb') as f:
+        while chunk := f.read(block):
+            n += chunk.count(b'\n')
+    return n
+
+
+def _read_marks_csv(file_name, chunksize=CHUNK_ROWS):
+    """Read a marks list into a compact frame (see :func:`_compact_marks`) chunk by chunk.
+
+    Marks and pass flags go into float32/bool arrays preallocated from the
+    line count, categorical columns into int16 codes over a vocabulary
+    grown chunk by chunk, and the other columns into Arrow arrays.
     """
-    Train AI model based on historical cutoff data.
+    import pyarrow as pa
+    capacity = _count_rows(file_name)
+    columns, arrays, vocab, text = None, {}, {}, {}
+    n = 0
+    for chunk in iter_marks_chunks(file_name, chunksize):
+        columns = columns or list(chunk.columns)
+        m = len(chunk)
+        for col in columns:
+            values = chunk[col]
+            if col in MARKS_COLS or col in PASS_COLS:
+                if col not in arrays:
+                    arrays[col] = np.empty(capacity, dtype=bool if col in PASS_COLS else np.float32)
+                arrays[col][n:n + m] = (values.to_numpy(dtype=bool) if col in PASS_COLS
+                                        else pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float32))
+            elif col in CATEGORICAL_COLS:
+                labels = vocab.setdefault(col, {})
+                part = pd.Categorical(values.astype(str))
+                lookup = np.array([labels.setdefault(c, len(labels)) for c in part.categories] + [-1],
+                                  dtype=np.int16)
+                arrays.setdefault(col, np.empty(capacity, dtype=np.int16))[n:n + m] = lookup[part.codes]
+            else:
+                if not pd.api.types.is_numeric_dtype(values):
+                    values = values.astype(str)
+                text.setdefault(col, []).append(pa.Array.from_pandas(values))
+        n += m
+    if columns is None:
+        return _compact_marks(_clean_marks(pd.read_csv(file_name, encoding='latin1', nrows=0)))
+
+    out = {}
+    for col in columns:
+        if col in vocab:
+            # categories in sorted order, as astype('category') gives them
+            labels = np.array(list(vocab[col]), dtype=object)
+            order = np.argsort(labels)
+            remap = np.empty(len(order) + 1, dtype=np.int16)
+            remap[order], remap[-1] = np.arange(len(order)), -1
+            out[col] = pd.Categorical.from_codes(remap[arrays[col][:n]], categories=labels[order])
+        elif col in arrays:
+            out[col] = arrays[col][:n]
+        else:
+            parts = text[col]
+            types = {p.type for p in parts if p.null_count < len(p)}
+            if len(types) > 1:
+                # e.g. a serial number column parsed as int64 in one chunk and float64 in another
+                numeric = all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types)
+                target = pa.float64() if numeric else pa.string()
+            else:
+                target = next(iter(types), pa.string())
+            out[col] = pa.chunked_array([p.cast(target) for p in parts], type=target).to_pandas()
+    return pd.DataFrame(out, columns=columns, copy=False)
+
+
+# Minimum computer marks per category: Pass_B for ordinary posts, Pass_C for
+# posts that need the CPT. Edit qualifying_rules.csv to change them.
+RULES_FILE = 'qualifying_rules.csv'
+DEFAULT_QUALIFYING_RULES = {'UR': (18, 27), 'OBC': (15, 24), 'EWS': (15, 24), 'SC': (12, 21), 'ST': (12, 21)}
+DEFAULT_RULE = (12, 21)
+
+
+def load_qualifying_rules(file_name=RULES_FILE):
+    """Return ``{category: (pass_b_min, pass_c_min)}``."""
+    return _load_qualifying_rules(file_name, file_signature(file_name))
+
+
+@_cached
+def _load_qualifying_rules(file_name, signature):
+    if signature is None:
+        return dict(DEFAULT_QUALIFYING_RULES)
+    df = pd.read_csv(file_name)
+    df.columns = [str(c).strip() for c in df.columns]
+    return {str(r.Category).strip(): (float(r.Pass_B), float(r.Pass_C)) for r in df.itertuples(index=False)}
+
+
+def qualifying_rule(category, rules=None):
+    rules = load_qualifying_rules() if rules is None else rules
+    return rules.get(category, DEFAULT_RULE)
+
+
+def qualifying_thresholds(categories, rules=None):
+    """Per-row (pass_b_min, pass_c_min) arrays for an array of categories.
+
+    Categories are turned into codes into the rule table (unknown ones get
+    code -1, which ``np.take`` maps to the trailing default rule).
     """
+    rules = load_qualifying_rules() if rules is None else rules
+    codes = pd.Categorical(np.asarray(categories, dtype=object), categories=list(rules)).codes
+    table = np.array(list(rules.values()) + [DEFAULT_RULE], dtype=float)
+    return np.take(table[:, 0], codes), np.take(table[:, 1], codes)
+
+
+def computer_pass_flags(categories, computer_marks, rules=None):
+    """Vectorised Pass_B / Pass_C flags for arrays of categories and marks."""
+    b_min, c_min = qualifying_thresholds(categories, rules)
+    comp = np.asarray(computer_marks, dtype=float)
+    return comp >= b_min, comp >= c_min
+
+
+# The cutoff model is trained offline (``python -m core train``) and saved
+# next to the app; the pages only load it. Categories are encoded with a
+# fixed table instead of per-frame ``cat.codes`` so a saved model keeps its
+# meaning whatever categories a training or scoring frame happens to hold.
+MODEL_FILE = "cutoff_model.joblib"
+MODEL_FEATURES = ["Vacancies", "Avg_Marks", "Category_Code"]
+CUTOFF_CATEGORIES = ['EWS', 'OBC', 'SC', 'ST', 'UR']
+CATEGORY_CODES = {c: i for i, c in enumerate(CUTOFF_CATEGORIES)}
 
-    # Example feature columns (modify as per your dataset)
-    feature_cols = [
-        "Vacancies",
-        "Avg_Marks",
-        "Category_Code"
-    ]
 
-    # Convert category to numeric
-    df["Category_Code"] = df["Category"].astype("category").cat.codes
+def category_codes(categories):
+    """Stable integer codes for category names (-1 for unknown ones)."""
+    return pd.Series(categories).astype(str).str.strip().str.upper().map(CATEGORY_CODES).fillna(-1).to_numpy(dtype=int)
+
+
+def _model_features(df):
+    """Feature matrix for the cutoff model; ``df`` is not modified."""
+    return np.column_stack([
+        df["Vacancies"].to_numpy(dtype=float),
+        df["Avg_Marks"].to_numpy(dtype=float),
+        category_codes(df["Category"]),
+    ])
+
+
+def train_cutoff_model(df):
+    """
+    Train AI model based on historical cutoff data.
+    """
+    # imported here: scikit-learn takes ~1s to import and the pages never train
+    from sklearn.ensemble import RandomForestRegressor
 
-    X = df[feature_cols]
-    y = df["Final_Cutoff"]
+    X = _model_features(df)
+    y = df["Final_Cutoff"].to_numpy(dtype=float)
 
     model = RandomForestRegressor(
         n_estimators=200,
@@ -58,107 +534,1600 @@ def train_cutoff_model(df):
 
     model.fit(X, y)
     return model
-    
-@st.cache_data
+
+
+def save_cutoff_model(model, path=MODEL_FILE):
+    """Save a trained model with its feature and category encoding."""
+    import joblib
+    # uncompressed so load_cutoff_model can memory-map the tree arrays
+    joblib.dump({'model': model, 'features': MODEL_FEATURES, 'categories': CUTOFF_CATEGORIES}, path)
+    return path
+
+
+def load_cutoff_model(path=MODEL_FILE):
+    """The saved cutoff model, or None if it has not been trained yet."""
+    return _load_cutoff_model(path, file_signature(path))
+
+
+@_cached
+def _load_cutoff_model(path, signature):
+    if signature is None:
+        return None
+    import joblib
+    saved = joblib.load(path, mmap_mode='r')
+    if saved.get('features') != MODEL_FEATURES or saved.get('categories') != CUTOFF_CATEGORIES:
+        raise ValueError(f"{path} was saved with a different feature encoding; retrain it")
+    return saved['model']
+
+
 def load_stat_data(file_name):
-    if not os.path.exists(file_name): 
+    source = _fresh_source(file_name)
+    return _load_stat_data(source, file_signature(source))
+
+
+@_cached
+def _load_stat_data(file_name, signature):
+    if signature is None:
         return None, None
-    df = pd.read_csv(file_name, encoding='latin1', on_bad_lines='skip')
-    df.columns = [str(c).strip() for c in df.columns]
-    key_col = 'Roll Number' if 'Roll Number' in df.columns else df.columns[0]
-    df['Stat Marks'] = pd.to_numeric(df.get('Stat Marks', df.iloc[:, -1]), errors='coerce')
-    return df[[key_col, 'Stat Marks']], key_col
+    with stage('load_stat') as record:
+        if file_name.endswith(SNAPSHOT_EXT):
+            df = read_snapshot(file_name)
+        else:
+            df = pd.read_csv(file_name, encoding='latin1', on_bad_lines='skip')
+            df.columns = [str(c).strip() for c in df.columns]
+            _add_stat_columns(df)
+        record['rows'] = len(df)
+    key_col = _key_column(df)
+    keys = [key_col] + [c for c in JOIN_KEY if c != key_col and c in df.columns]
+    cols = keys + [c for c in ['Stat Marks', 'Stat Total Marks'] if c in df.columns]
+    return df[cols], key_col
+
+
+def _add_stat_columns(df):
+    stat_col = next((c for c in ['Stat Marks', 'Statistics Marks'] if c in df.columns), df.columns[-1])
+    df['Stat Marks'] = pd.to_numeric(df[stat_col], errors='coerce')
+    if 'Main Paper Marks' in df.columns:
+        df['Stat Total Marks'] = pd.to_numeric(df['Main Paper Marks'], errors='coerce') + df['Stat Marks']
+
+
+def clean_vacancy_data(df):
+    df.columns = df.columns.str.strip()
+
+    # Remove newline characters & extra spaces
+    for col in df.columns:
+        if pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].astype(str).str.replace("\n", " ", regex=False).str.strip()
+
+    # Convert vacancy columns to numeric
+    vacancy_cols = ["UR", "SC", "ST", "OBC", "EWS", "Total"]
+    for col in vacancy_cols:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
+
+    return df
+
+
+def load_vacancy_data(file_name):
+    source = _fresh_source(file_name)
+    return _load_vacancy_data(source, file_signature(source))
+
+
+@_cached
+def _load_vacancy_data(file_name, signature):
+    if signature is None:
+        return None
+    if file_name.endswith(SNAPSHOT_EXT):
+        return read_snapshot(file_name)
+    return _read_vacancy_csv(file_name)
+
+
+def _read_vacancy_csv(file_name):
+    df = pd.read_csv(file_name)
+    # the last line of the published sheet is a grand total, not a post
+    df = df.dropna(subset=['Post Name'])
+    return clean_vacancy_data(df)
+
+
+# --- PART 2: COLUMNAR SNAPSHOTS ---
+# A snapshot is an uncompressed Feather (Arrow IPC) file written next to the
+# CSV. The loaders above prefer it whenever it is newer than the CSV, and it
+# is memory-mapped on read instead of being parsed.
+SNAPSHOT_EXT = '.feather'
+CATEGORICAL_COLS = ['Category', 'Category-2', 'Gender', 'State']
+MARKS_COLS = [
+    'Main Paper Marks', 'Computer Marks', 'Statistics Marks', 'Stat Marks',
+    'Stat Total Marks', 'Statistics + Main(Without Computer)', 'Total_Stat_Marks',
+]
+# the Main list joined with the Statistics marks, see convert_pool_snapshot
+POOL_SUFFIX = '.pool'
+
+
+def snapshot_path(file_name):
+    return os.path.splitext(file_name)[0] + SNAPSHOT_EXT
+
+
+def pool_snapshot_path(main_file):
+    return os.path.splitext(main_file)[0] + POOL_SUFFIX + SNAPSHOT_EXT
+
+
+def _fresh_source(file_name, *depends_on):
+    """Return the snapshot of ``file_name`` if it is newer than the CSV (and
+    any other file it was derived from), else the CSV itself."""
+    snap_sig = file_signature(snapshot_path(file_name))
+    if snap_sig is None:
+        return file_name
+    for source in (file_name,) + depends_on:
+        sig = file_signature(source)
+        if sig is not None and sig[1] > snap_sig[1]:
+            return file_name
+    return snapshot_path(file_name)
+
+
+def read_snapshot(path):
+    from pyarrow import feather
+    with stage('read_snapshot') as record:
+        table = feather.read_table(path, memory_map=True)
+        record['rows'] = table.num_rows
+        return table.to_pandas(split_blocks=True)
+
+
+def _compact_marks(df):
+    """Categorical labels, float32 marks and boolean pass flags."""
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        if col in CATEGORICAL_COLS:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(str).astype('category')
+        elif col in MARKS_COLS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+        elif col in ('Pass_B', 'Pass_C'):
+            df[col] = df[col].astype(bool)
+        elif not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype(str)
+    return df
+
+
+def convert_to_snapshot(file_name):
+    """Write the typed snapshot for a marks list or vacancy CSV.
+
+    Returns the snapshot path.
+    """
+    from pyarrow import feather
+    header = [str(c).strip() for c in pd.read_csv(file_name, encoding='latin1', nrows=0).columns]
+    if 'Post Name' in header:
+        df = _read_vacancy_csv(file_name).reset_index(drop=True)
+    else:
+        df = _read_marks_csv(file_name)
+        if any(c in df.columns for c in ['Stat Marks', 'Statistics Marks']):
+            _add_stat_columns(df)
+        df = _compact_marks(df)
+    path = snapshot_path(file_name)
+    feather.write_feather(df, path, compression='uncompressed')
+    return path
+
+
+def _fresh_pool(main_file, stat_file):
+    """The joined pool snapshot if it is newer than every file it was built
+    from, else None."""
+    pool_sig = file_signature(pool_snapshot_path(main_file))
+    if pool_sig is None:
+        return None
+    for source in (main_file, snapshot_path(main_file), stat_file, snapshot_path(stat_file), RULES_FILE):
+        sig = file_signature(source)
+        if sig is not None and sig[1] > pool_sig[1]:
+            return None
+    return pool_snapshot_path(main_file)
+
+
+def convert_pool_snapshot(main_file, stat_file):
+    """Join the Statistics marks onto the Main list once and write the result.
+
+    Sessions then read the joined pool directly instead of joining on every
+    load. Returns the snapshot path and the :class:`JoinReport`.
+    """
+    from pyarrow import feather
+    df_main, main_key = load_and_clean_data(main_file)
+    df_stat, stat_key = load_stat_data(stat_file)
+    if df_main is None or df_stat is None:
+        raise FileNotFoundError(main_file if df_main is None else stat_file)
+    df, report = join_stat_marks(df_main, main_key, df_stat, stat_key)
+    df['Total_Stat_Marks'] = df['Main Paper Marks'] + df['Stat Marks']
+    path = pool_snapshot_path(main_file)
+    feather.write_feather(_compact_marks(df), path, compression='uncompressed')
+    return path, report
+
+
 def predict_cutoff(model, vacancies, avg_marks, category_code):
     input_data = np.array([[vacancies, avg_marks, category_code]])
     prediction = model.predict(input_data)
     return round(prediction[0], 2)
 
-def get_full_vacancy_list():    
-    return [
-        ("L-7", "CSS (DoPT) - ASO", 273, 104, 52, 185, 68, 682, True, False),
-        ("L-7", "MEA - ASO", 44, 13, 0, 33, 10, 100, True, False),
-        ("L-7", "CBIC - Inspector (Examiner)", 68, 18, 24, 13, 14, 137, True, False),
-        ("L-7", "CBIC - Inspector (Preventive Officer)", 138, 75, 20, 91, 29, 353, True, False),
-        ("L-7", "CBIC - Inspector (Central Excise)", 611, 175, 82, 269, 169, 1306, True, False),
-        ("L-7", "CBDT - IT Inspector", 176, 52, 39, 95, 27, 389, False, False),
-        ("L-7", "ED - Assistant Enforcement Officer", 1, 2, 2, 13, 0, 18, False, False),
-        ("L-7", "IB - ASO", 100, 24, 19, 39, 15, 197, False, False),
-        ("L-7", "Railways - ASO", 23, 4, 4, 14, 3, 48, False, False),
-        ("L-7", "EPFO - ASO", 36, 17, 5, 30, 6, 94, False, False),
-        ("L-7", "CBI - Sub Inspector", 52, 12, 5, 18, 6, 93, False, False),
-        ("L-7", "NIC - ASO", 2, 0, 0, 0, 1, 3, False, False),
-        ("L-7", "CAT - ASO", 0, 0, 0, 0, 1, 1, False, False),
-        ("L-7", "CBN - Inspector", 1, 1, 0, 1, 1, 4, False, False),
-        ("L-7", "ECI - ASO", 0, 0, 0, 5, 1, 6, False, False),
-        ("L-7", "MeitY - ASO", 2, 0, 1, 0, 0, 3, False, False),
-        ("L-6", "CBIC - Executive Assistant", 89, 24, 12, 40, 18, 183, True, False),
-        ("L-6", "CBDT - Office Superintendent", 2766, 1012, 496, 1822, 657, 6753, False, False),
-        ("L-6", "RGI - Statistical Investigator Gr. II", 50, 18, 12, 28, 10, 118, False, True),
-        ("L-6", "MoSPI - Junior Statistical Officer", 124, 47, 15, 36, 27, 249, False, True),
-        ("L-6", "ED - Assistant", 0, 0, 0, 3, 0, 3, False, False),
-        ("L-6", "TRAI - Assistant", 2, 1, 0, 0, 0, 3, False, False),
-        ("L-6", "Official Language - Assistant", 4, 0, 0, 1, 0, 5, False, False),
-        ("L-6", "MCA - Assistant", 0, 1, 0, 0, 0, 1, False, False),
-        ("L-6", "Mines - Assistant", 11, 2, 2, 3, 4, 22, True, False),
-        ("L-6", "Textiles - Assistant", 1, 0, 0, 0, 0, 1, False, False),
-        ("L-6", "Indian Coast Guard - Assistant", 8, 3, 1, 5, 1, 18, False, False),
-        ("L-6", "DFSS - Assistant", 1, 0, 0, 1, 1, 3, False, False),
-        ("L-6", "NCB - ASO", 7, 1, 1, 2, 0, 11, False, False),
-        ("L-6", "NCB - Sub-Inspector/JIO", 10, 3, 4, 8, 5, 30, False, False),
-        ("L-6", "NIA - Sub Inspector", 6, 2, 1, 3, 2, 14, False, False),
-        ("L-6", "MoSPI - Assistant", 0, 0, 0, 2, 0, 2, False, False),
-        ("L-5", "CGDA - Auditor", 477, 176, 88, 316, 117, 1174, False, False),
-        ("L-5", "C&AG - Accountant", 86, 31, 17, 28, 18, 180, False, False),
-        ("L-5", "Posts - Accountant", 42, 13, 6, 12, 3, 76, False, False),
-        ("L-5", "CGCA - Accountant", 15, 6, 3, 9, 3, 36, False, False),
-        ("L-4", "CBIC - Tax Assistant", 256, 136, 82, 203, 94, 771, True, False),
-        ("L-4", "CBDT - Tax Assistant", 572, 171, 80, 340, 86, 1249, False, False),
-        ("L-4", "MSME - UDC/SSA", 25, 4, 5, 16, 5, 55, False, False),
-        ("L-4", "Science & Tech - UDC/SSA", 24, 9, 4, 16, 6, 59, False, False),
-        ("L-4", "CBN - UDC/SSA", 12, 2, 0, 5, 2, 21, False, False),
-        ("L-4", "CBN - Sub-Inspector", 11, 2, 0, 6, 0, 19, False, False),
-        ("L-4", "Mines - UDC/SSA", 13, 2, 3, 4, 4, 26, False, False),
-        ("L-4", "DGDE - UDC/SSA", 7, 2, 1, 3, 1, 14, False, False),
-        ("L-4", "MeitY - UDC/SSA", 5, 1, 1, 2, 1, 10, False, False),
-        ("L-4", "Textiles - UDC/SSA", 4, 0, 1, 1, 2, 8, False, False),
-        ("L-4", "Water Resources - UDC/SSA", 5, 0, 0, 0, 0, 5, False, False),
-        ("L-4", "BRO - UDC/SSA", 20, 1, 0, 0, 4, 25, False, False),
-        ("L-4", "Agriculture - UDC/SSA", 2, 0, 0, 0, 1, 3, False, False),
-        ("L-4", "Health - UDC/SSA", 1, 0, 0, 0, 0, 1, False, False),
-        ("L-4", "Dept of Post - PA/SA", 0, 0, 0, 0, 0, 0, True, False)
+
+def predict_cutoffs(model, posts_df, avg_marks, categories=None):
+    """Predicted cutoff for every post x category in one ``model.predict`` call.
+
+    ``posts_df`` has a vacancy column per category (as from :func:`get_posts_df`);
+    ``avg_marks`` is a scalar or one value per post. Returns 'Level', 'Post'
+    and a '<category> Cutoff' column per category.
+    """
+    categories = list(categories or ['UR', 'SC', 'ST', 'OBC', 'EWS'])
+    vacancies = posts_df[categories].to_numpy(dtype=float)
+    n_posts, n_cats = vacancies.shape
+    marks = np.broadcast_to(np.asarray(avg_marks, dtype=float).reshape(-1, 1), (n_posts, n_cats))
+    codes = np.broadcast_to(category_codes(categories), (n_posts, n_cats))
+    X = np.column_stack([vacancies.ravel(), marks.ravel(), codes.ravel()])
+    pred = model.predict(X).reshape(n_posts, n_cats).round(2) if n_posts else np.empty((0, n_cats))
+    out = posts_df[['Level', 'Post']].reset_index(drop=True)
+    return out.assign(**{f"{c} Cutoff": pred[:, i] for i, c in enumerate(categories)})
+
+# --- POST CATALOG ---
+# vacancy_data.csv is the one source of posts. Besides the published columns
+# it carries Short_Name (the label used in every table), Is_CPT_Post,
+# Is_Stat_Post and Allocation_Order (the order posts are filled in within a
+# pay level). The parsed catalog is cached as a structured array.
+VACANCY_FILE = "vacancy_data.csv"
+VACANCY_COLS = ['UR', 'SC', 'ST', 'OBC', 'EWS', 'Total']
+HORIZONTAL_COLS = ['ESM', 'OH', 'HH', 'VH', 'Other PWD']
+
+
+def _squash(values):
+    """Collapse the line breaks and runs of spaces in the published names."""
+    return pd.Series(values, dtype=object).fillna('').astype(str).str.split().str.join(' ')
+
+
+def _flag(values):
+    return pd.Series(values, dtype=object).astype(str).str.strip().str.lower().isin(['true', 'yes', '1'])
+
+
+def _short_name(department, post):
+    """Fallback label for a post without Short_Name: '<dept abbreviation> - <post>'."""
+    inner = department[department.find('(') + 1:department.find(')')] if '(' in department else ''
+    return f"{inner or department.split(',')[0]} - {post}"
+
+
+def load_post_catalog(file_name=VACANCY_FILE):
+    """The post catalog as a structured array, or None if the file is missing."""
+    source = _fresh_source(file_name)
+    return _load_post_catalog(source, file_signature(source))
+
+
+@_cached
+def _load_post_catalog(file_name, signature):
+    if signature is None:
+        return None
+    df = _load_vacancy_data(file_name, signature).reset_index(drop=True)
+    department = _squash(df['Department'])
+    post_name = _squash(df['Post Name'])
+    short = _squash(df['Short_Name']) if 'Short_Name' in df.columns else pd.Series('', index=df.index)
+    short = short.where(short != '', [_short_name(d, p) for d, p in zip(department, post_name)])
+    level = pd.to_numeric(df['Pay Level'].astype(str).str.extract(r'(\d+)')[0], errors='coerce').fillna(0)
+    order = (pd.to_numeric(df['Allocation_Order'], errors='coerce') if 'Allocation_Order' in df.columns
+             else pd.Series(np.nan, index=df.index))
+    # posts without an explicit order follow the ordered ones in file order
+    fallback = pd.Series(np.arange(len(df)) + (order.max() + 1 if order.notna().any() else 0), index=df.index)
+    order = order.fillna(fallback)
+
+    fields = {
+        'level': level.to_numpy(dtype=np.uint8),
+        'post': short.to_numpy(dtype=str),
+        'post_name': post_name.to_numpy(dtype=str),
+        'department': department.to_numpy(dtype=str),
+    }
+    for col in VACANCY_COLS + HORIZONTAL_COLS:
+        fields[col] = (pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(dtype=np.int32)
+                       if col in df.columns else np.zeros(len(df), dtype=np.int32))
+    fields['is_cpt'] = _flag(df.get('Is_CPT_Post', False)).to_numpy()
+    fields['is_stat'] = _flag(df.get('Is_Stat_Post', False)).to_numpy()
+    fields['order'] = order.to_numpy(dtype=np.int32)
+    catalog = np.rec.fromarrays(list(fields.values()), names=list(fields))
+    # allocation order: highest pay level first, then Allocation_Order
+    catalog = catalog[np.lexsort((catalog['order'], -catalog['level'].astype(np.int64)))]
+    catalog.flags.writeable = False
+    return catalog
+
+
+# --- PART 3: POST-WISE ALLOCATION ENGINE ---
+RESERVED_CATEGORIES = ['SC', 'ST', 'OBC', 'EWS']
+SCORE_COLS = ['Main Paper Marks', 'Total_Stat_Marks']
+# horizontal sub-quotas: 0 = none, then one code per HORIZONTAL_COLS entry,
+# matched against the candidates' 'Category-2' column
+SUB_QUOTA_CODES = {'esm': 1, 'oh': 2, 'hh': 3, 'vh': 4, 'other-pwd': 5, 'other pwd': 5}
+
+
+def sub_quota_codes(values):
+    """Sub-quota code per candidate (0 for 'none' or anything unknown)."""
+    labels = pd.Series(np.asarray(values, dtype=object)).astype(str).str.strip().str.lower()
+    return labels.map(SUB_QUOTA_CODES).fillna(0).to_numpy(dtype=np.uint8)
+
+
+def horizontal_quotas(posts_df):
+    """ESM/PwD quotas per (post, vertical seat, sub-quota).
+
+    The vacancy list gives each post's horizontal counts only in total, so
+    they are split across UR and the reserved categories in proportion to
+    the vertical vacancies (largest remainder), and capped so a seat never
+    reserves more than it has. Shape is (posts, len(SEAT_TYPES),
+    1 + len(HORIZONTAL_COLS)); index 0 of the last axis is unused.
+    """
+    vac = posts_df[SEAT_TYPES].to_numpy(dtype=np.int64)
+    counts = np.column_stack([
+        posts_df[c].to_numpy(dtype=np.int64) if c in posts_df.columns else np.zeros(len(posts_df), dtype=np.int64)
+        for c in HORIZONTAL_COLS])
+    total = np.maximum(vac.sum(axis=1), 1)
+    share = counts[:, :, None] * vac[:, None, :] / total[:, None, None]
+    quota = np.floor(share).astype(np.int64)
+    short = np.minimum(counts, vac.sum(axis=1)[:, None]) - quota.sum(axis=2)
+    # hand the rounding remainder to the largest fractional shares
+    rank = np.argsort(np.argsort(-(share - quota), axis=2, kind='stable'), axis=2, kind='stable')
+    quota += rank < short[:, :, None]
+
+    out = np.zeros((len(posts_df), len(SEAT_TYPES), 1 + len(HORIZONTAL_COLS)), dtype=np.int64)
+    left = vac.copy()
+    for q in range(len(HORIZONTAL_COLS)):
+        out[:, :, q + 1] = np.minimum(quota[:, q, :], left)
+        left -= out[:, :, q + 1]
+    return out
+
+
+@dataclass
+class AllocationState:
+    """Sorted candidate arrays and per-post seat bookkeeping.
+
+    Kept on every :class:`AllocationResult` so that :func:`insert_candidate`
+    can resume the allocation from the first post a new candidate affects.
+    ``cats`` holds seat codes (see :func:`seat_codes`). ``seat_ends[k, j]``
+    is the position in seat ``j``'s order (UR, then RESERVED_CATEGORIES) up
+    to which post ``k`` took candidates: anyone inserted before that
+    position would have been picked. With horizontal reservation, ``sub``
+    holds sub-quota codes, ``horizontal`` the quotas from
+    :func:`horizontal_quotas` and ``sub_orders`` each seat order restricted
+    to one sub-quota.
+    """
+    scores: dict
+    cats: np.ndarray
+    rolls: np.ndarray
+    merit: np.ndarray
+    orders: dict
+    ranks: dict
+    cat_orders: dict
+    posts: pd.DataFrame
+    post_of: np.ndarray
+    seat_ends: np.ndarray
+    sub: np.ndarray = None
+    horizontal: np.ndarray = None
+    sub_orders: dict = None
+    merit_pos: np.ndarray = None
+
+
+@dataclass
+class AllocationResult:
+    """Output of :func:`allocate_posts`.
+
+    ``cutoffs`` has one row per post (in allocation order) with numeric
+    cutoffs (NaN where no seat was filled), ``allotted`` maps each post to
+    the roll numbers it took and ``last_rank`` to the merit rank of the last
+    candidate it took.
+    """
+    cutoffs: pd.DataFrame
+    allotted: dict
+    last_rank: dict
+    state: AllocationState = None
+
+
+def _take_unallocated(order, cursor, allocated, k):
+    """Return the first ``k`` unallocated entries of ``order`` from ``cursor``.
+
+    Everything before ``cursor`` is already allocated, so the scan never
+    looks back; the returned cursor keeps that invariant.
+    """
+    n = len(order)
+    if k <= 0 or cursor >= n:
+        return order[:0], cursor
+    picked = []
+    need = k
+    window = max(2 * k, 64)
+    while need > 0 and cursor < n:
+        seg = order[cursor:cursor + window]
+        free = np.flatnonzero(~allocated[seg])
+        if len(free) >= need:
+            picked.append(seg[free[:need]])
+            cursor += int(free[need - 1]) + 1
+            need = 0
+        else:
+            picked.append(seg[free])
+            need -= len(free)
+            cursor += len(seg)
+            window *= 2
+    return np.concatenate(picked), cursor
+
+
+def _inverse(order):
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(1, len(order) + 1)
+    return rank
+
+
+def _build_state(scores, cats, rolls, posts_df, sub=None, horizontal=None):
+    # ties on a score column keep the Main+Stat merit order
+    merit = np.argsort(-scores['Total_Stat_Marks'], kind='stable').astype(np.int32)
+    orders = {col: merit[np.argsort(-scores[col][merit], kind='stable')] for col in SCORE_COLS}
+    cat_orders = {
+        (col, cat): order[cats[order] == SEAT_TYPES.index(cat)]
+        for col, order in orders.items() for cat in RESERVED_CATEGORIES
+    }
+    sub_orders = None
+    if horizontal is not None:
+        # the indexed subsets horizontal quotas are filled from
+        seat_orders = [(None, merit)] + list(cat_orders.items())
+        sub_orders = {
+            (key, q): order[sub[order] == q]
+            for key, order in seat_orders for q in range(1, len(HORIZONTAL_COLS) + 1)
+        }
+    posts = posts_df.reset_index(drop=True)
+    return AllocationState(
+        scores=scores, cats=cats, rolls=rolls, merit=merit, orders=orders,
+        ranks={col: _inverse(order) for col, order in orders.items()},
+        cat_orders=cat_orders, posts=posts,
+        post_of=np.full(len(cats), -1, dtype=np.int32),
+        seat_ends=np.zeros((len(posts), 1 + len(RESERVED_CATEGORIES)), dtype=np.int64),
+        sub=sub, horizontal=horizontal, sub_orders=sub_orders,
+        merit_pos=_inverse(merit) - 1 if horizontal is not None else None,
+    )
+
+
+def _fill_horizontal(state, k, j, key, order, picked, cursor, allocated, sub_cursors):
+    """Bring seat ``j`` of post ``k`` up to its horizontal quotas.
+
+    For each sub-quota short of its count, the best unallocated candidates
+    of that sub-quota replace the lowest-merit picks that have none. The
+    replaced candidates go back to the pool, so the seat's cursor is moved
+    back to the first of them. Returns the new picks and cursor.
+    """
+    quotas = state.horizontal[k, j]
+    for q in np.flatnonzero(quotas):
+        need = int(quotas[q]) - int(np.count_nonzero(state.sub[picked] == q))
+        if need <= 0:
+            continue
+        plain = np.flatnonzero(state.sub[picked] == 0)[::-1][:need]
+        if not len(plain):
+            break
+        sub_key = (key, q)
+        extra, sub_cursors[sub_key] = _take_unallocated(
+            state.sub_orders[sub_key], sub_cursors.get(sub_key, 0), allocated, len(plain))
+        if not len(extra):
+            continue
+        out = picked[plain[:len(extra)]]
+        allocated[out] = False
+        allocated[extra] = True
+        picked = np.concatenate([np.delete(picked, plain[:len(extra)]), extra])
+        # the positions of the replaced candidates in this seat's order
+        if key is None:
+            out_pos = state.merit_pos[out]
+        else:
+            ranks = state.ranks[key[0]]
+            out_pos = np.searchsorted(ranks[order], ranks[out])
+        cursor = min(cursor, int(out_pos.min()))
+    return picked, cursor
+
+
+def _run_posts(state, start=0):
+    """Allocate posts ``start..`` on top of the allotments of earlier posts."""
+    allocated = (state.post_of >= 0) & (state.post_of < start)
+    state.post_of[~allocated] = -1
+    ur_cursor = 0
+    cat_cursors = dict.fromkeys(state.cat_orders, 0)
+    sub_cursors = {}
+
+    rows, allotted, last_rank = [], {}, {}
+    for k, post in enumerate(state.posts.iloc[start:].itertuples(index=False), start):
+        score_col = 'Total_Stat_Marks' if post.IsStat else 'Main Paper Marks'
+        values = state.scores[score_col]
+        row = {'Pay Level': post.Level, 'Post': post.Post}
+        taken = []
+
+        # UR seats go to the top of the whole pool (ranked on Main+Stat),
+        # then each reserved category takes from its own cursor
+        seats = [('UR', state.merit, None)] + [
+            (cat, state.cat_orders[score_col, cat], (score_col, cat)) for cat in RESERVED_CATEGORIES]
+        for j, (cat, order, key) in enumerate(seats):
+            vac = int(getattr(post, cat))
+            cursor = ur_cursor if key is None else cat_cursors[key]
+            picked, cursor = _take_unallocated(order, cursor, allocated, vac)
+            if state.horizontal is not None and len(picked):
+                allocated[picked] = True
+                picked, cursor = _fill_horizontal(state, k, j, key, order, picked, cursor,
+                                                  allocated, sub_cursors)
+            if key is None:
+                ur_cursor = cursor
+            else:
+                cat_cursors[key] = cursor
+            allocated[picked] = True
+            state.post_of[picked] = k
+            if vac <= 0:
+                state.seat_ends[k, j] = 0
+            elif len(picked) < vac:
+                state.seat_ends[k, j] = len(order) + 1
+            else:
+                state.seat_ends[k, j] = cursor
+            row[f'{cat} Cutoff'] = values[picked].min() if len(picked) else np.nan
+            taken.append(picked)
+
+        taken = np.concatenate(taken)
+        row['Last Rank'] = int(state.ranks[score_col][taken].max()) if len(taken) else np.nan
+        row['IsCPT'], row['IsStat'] = bool(post.IsCPT), bool(post.IsStat)
+        rows.append(row)
+        allotted[post.Post] = state.rolls[taken]
+        last_rank[post.Post] = row['Last Rank']
+
+    cutoffs = pd.DataFrame(rows)
+    cut_cols = [f'{c} Cutoff' for c in ['UR'] + RESERVED_CATEGORIES]
+    cutoffs[cut_cols] = cutoffs[cut_cols].astype(float).where(cutoffs[cut_cols] > 0)
+    return AllocationResult(cutoffs=cutoffs, allotted=allotted, last_rank=last_rank, state=state)
+
+
+@heavy
+@profiled('allocate_pay_level', rows=lambda df, *args, **kwargs: len(df))
+def allocate_posts(df, posts_df, key_col=None, horizontal=False):
+    """Allocate candidates to posts in pay-level order in one pass.
+
+    Candidates are sorted once per score column ('Main Paper Marks' and
+    'Total_Stat_Marks'); each post then takes its UR seats from the top of
+    the unallocated pool and its reserved seats from per-category cursors.
+    ``df`` is a candidate pool DataFrame or a :class:`CandidateStore`.
+    With ``horizontal``, each seat also meets its ESM/PwD quotas (see
+    :func:`horizontal_quotas`) from per-sub-quota cursors.
+    """
+    store = as_candidate_store(df, key_col)
+    scores = {'Main Paper Marks': store.main, 'Total_Stat_Marks': store.total}
+    if horizontal:
+        state = _build_state(scores, store.cat, store.rolls, posts_df, store.sub, horizontal_quotas(posts_df))
+    else:
+        state = _build_state(scores, store.cat, store.rolls, posts_df)
+    return _run_posts(state)
+
+
+def _insert_position(order, values, value, merit_rank, merit_pos):
+    """Where a new candidate goes in ``order`` (score desc, then merit)."""
+    keys = -values[order]
+    lo = np.searchsorted(keys, -value, side='left')
+    hi = np.searchsorted(keys, -value, side='right')
+    return int(lo + np.searchsorted(merit_rank[order[lo:hi]], merit_pos, side='left'))
+
+
+@heavy
+@profiled('insert_candidate',
+          rows=lambda result, *args, **kwargs: len(result.state.cats) if result.state else None)
+def insert_candidate(result, main, stat, category, roll="YOU", sub_category='none'):
+    """Re-allocate after adding one hypothetical candidate to ``result``.
+
+    Posts before the first one the candidate would take a seat in are
+    reused as they are; only the posts from there on are recomputed.
+    Returns ``(new_result, post)`` where ``post`` is the candidate's post,
+    or None if they get none. Only pay-level results (:func:`allocate_posts`)
+    carry the state this needs.
+    """
+    old = result.state
+    if old is None:
+        raise ValueError("incremental insert only supports pay-level allocations")
+    n = len(old.cats)
+    if old.horizontal is not None:
+        # quota swaps move picks off the top-N prefix the shortcut relies on
+        scores = {'Main Paper Marks': np.append(old.scores['Main Paper Marks'], float(main)),
+                  'Total_Stat_Marks': np.append(old.scores['Total_Stat_Marks'], float(main) + float(stat))}
+        state = _build_state(scores, np.append(old.cats, seat_codes([category])).astype(np.uint8),
+                             np.append(old.rolls.astype(object), roll), old.posts,
+                             np.append(old.sub, sub_quota_codes([sub_category])), old.horizontal)
+        new_result = _run_posts(state)
+        k = state.post_of[n]
+        return new_result, (old.posts['Post'].iloc[k] if k >= 0 else None)
+    value = {'Main Paper Marks': float(main), 'Total_Stat_Marks': float(main) + float(stat)}
+    merit_rank0 = np.empty(n, dtype=np.int64)
+    merit_rank0[old.merit] = np.arange(n)
+    # a new candidate ranks after everyone they tie with
+    merit_pos = int(np.searchsorted(-old.scores['Total_Stat_Marks'][old.merit], -value['Total_Stat_Marks'], side='right'))
+
+    positions = {col: _insert_position(old.orders[col], old.scores[col], value[col], merit_rank0, merit_pos)
+                 for col in SCORE_COLS}
+    cat_positions = {}
+    if category in RESERVED_CATEGORIES:
+        for col in SCORE_COLS:
+            order = old.cat_orders[col, category]
+            cat_positions[col] = _insert_position(order, old.scores[col], value[col], merit_rank0, merit_pos)
+
+    # first post where the candidate would have been picked
+    is_stat = old.posts['IsStat'].to_numpy(dtype=bool)
+    hit = merit_pos < old.seat_ends[:, 0]
+    if category in RESERVED_CATEGORIES:
+        j = 1 + RESERVED_CATEGORIES.index(category)
+        cat_pos = np.where(is_stat, cat_positions.get('Total_Stat_Marks'), cat_positions.get('Main Paper Marks'))
+        hit |= cat_pos < old.seat_ends[:, j]
+    start = int(np.argmax(hit)) if hit.any() else len(hit)
+
+    scores = {col: np.append(old.scores[col], value[col]) for col in SCORE_COLS}
+    orders = {col: np.insert(old.orders[col], positions[col], n) for col in SCORE_COLS}
+    cat_orders = dict(old.cat_orders)
+    for col, pos in cat_positions.items():
+        cat_orders[col, category] = np.insert(old.cat_orders[col, category], pos, n)
+    state = AllocationState(
+        scores=scores,
+        cats=np.append(old.cats, seat_codes([category])).astype(np.uint8),
+        rolls=np.append(old.rolls.astype(object), roll),
+        merit=np.insert(old.merit, merit_pos, n),
+        orders=orders,
+        ranks={col: _inverse(order) for col, order in orders.items()},
+        cat_orders=cat_orders,
+        posts=old.posts,
+        post_of=np.append(old.post_of, -1).astype(np.int32),
+        seat_ends=old.seat_ends.copy(),
+    )
+    tail = _run_posts(state, start) if start < len(hit) else AllocationResult(result.cutoffs.iloc[:0], {}, {})
+
+    # earlier posts keep their picks, but ranks behind the candidate move down one
+    kept = result.cutoffs.iloc[:start].copy()
+    kept_pos = np.where(is_stat[:start], positions['Total_Stat_Marks'], positions['Main Paper Marks'])
+    kept['Last Rank'] = kept['Last Rank'] + (kept_pos < kept['Last Rank'].to_numpy())
+    head_posts = old.posts['Post'].iloc[:start]
+    new_result = AllocationResult(
+        cutoffs=pd.concat([kept, tail.cutoffs], ignore_index=True),
+        allotted={**{p: result.allotted[p] for p in head_posts}, **tail.allotted},
+        last_rank={**dict(zip(head_posts, kept['Last Rank'])), **tail.last_rank},
+        state=state,
+    )
+    k = state.post_of[n]
+    return new_result, (old.posts['Post'].iloc[k] if k >= 0 else None)
+
+
+PAY_LEVEL_ORDER = {"L-7": 7, "L-6": 6, "L-5": 5, "L-4": 4}
+
+
+def get_posts_df(file_name=VACANCY_FILE):
+    """The post catalog as a DataFrame in allocation order (highest pay level first).
+
+    Cached and shared; callers must not modify it.
+    """
+    source = _fresh_source(file_name)
+    return _posts_df(source, file_signature(source))
+
+
+@_cached
+def _posts_df(file_name, signature):
+    catalog = _load_post_catalog(file_name, signature)
+    if catalog is None:
+        raise FileNotFoundError(file_name)
+    posts_df = pd.DataFrame({
+        'Level': [f"L-{n}" for n in catalog['level']],
+        'Post': catalog['post'].astype(object),
+        **{col: catalog[col] for col in VACANCY_COLS},
+        'IsCPT': catalog['is_cpt'],
+        'IsStat': catalog['is_stat'],
+        'PayLevelNum': catalog['level'].astype(int),
+        'Department': catalog['department'].astype(object),
+        'Post Name': catalog['post_name'].astype(object),
+        **{col: catalog[col] for col in HORIZONTAL_COLS},
+    })
+    return posts_df
+
+
+# Roll numbers are published masked ('6******469'), so they collide. The
+# Statistics list is matched on masked roll + masked name + category + Main
+# marks; rows that agree on all four are paired in list order, so the join
+# is one-to-one and never adds rows to the Main list.
+JOIN_KEY = ['Roll Number', 'Name', 'Category', 'Main Paper Marks']
+
+
+@dataclass
+class JoinReport:
+    """What :func:`join_stat_marks` matched and which keys were ambiguous."""
+    main_rows: int
+    stat_rows: int
+    matched: int
+    key: list
+    main_duplicates: pd.DataFrame
+    stat_duplicates: pd.DataFrame
+
+    @property
+    def unmatched_stat(self):
+        return self.stat_rows - self.matched
+
+    def summary(self):
+        return (f"{self.matched} of {self.stat_rows} Statistics rows matched on {' + '.join(self.key)}; "
+                f"{len(self.main_duplicates)} Main and {len(self.stat_duplicates)} Statistics rows "
+                f"share a key with another row")
+
+
+def _join_hash(df, cols):
+    """One uint64 per row for the composite key, plus its occurrence number."""
+    keys = pd.DataFrame({
+        c: pd.to_numeric(df[c], errors='coerce').astype(float) if c == 'Main Paper Marks'
+        else df[c].astype(str).str.strip().str.upper()
+        for c in cols
+    })
+    h = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    occurrence = pd.Series(h).groupby(h).cumcount().to_numpy()
+    return h, occurrence
+
+
+@profiled('join', rows=lambda df_main, main_key, df_stat, *args: len(df_main) + len(df_stat))
+def join_stat_marks(df_main, main_key, df_stat, stat_key):
+    """Hash-join the Statistics marks onto the Main list (left join, one-to-one).
+
+    Returns the Main list with 'Stat Marks' (0 when absent) and a
+    :class:`JoinReport`.
+    """
+    key = [c for c in JOIN_KEY if c in df_main.columns and c in df_stat.columns]
+    left, right = ([main_key] + [c for c in key if c != main_key],
+                   [stat_key] + [c for c in key if c != stat_key])
+    main_hash, main_occ = _join_hash(df_main, left)
+    stat_hash, stat_occ = _join_hash(df_stat, right)
+
+    stat_rows = pd.Series(np.arange(len(df_stat)),
+                          index=pd.MultiIndex.from_arrays([stat_hash, stat_occ]))
+    pos = stat_rows.reindex(pd.MultiIndex.from_arrays([main_hash, main_occ])).to_numpy()
+    hit = ~np.isnan(pos)
+    stat_marks = np.zeros(len(df_main))
+    stat_marks[hit] = pd.to_numeric(df_stat['Stat Marks'], errors='coerce').fillna(0).to_numpy()[pos[hit].astype(np.int64)]
+
+    joined = df_main.copy()
+    joined['Stat Marks'] = stat_marks
+    report = JoinReport(
+        main_rows=len(df_main), stat_rows=len(df_stat), matched=int(hit.sum()), key=left,
+        main_duplicates=df_main[pd.Series(main_hash).duplicated(keep=False).to_numpy()][left],
+        stat_duplicates=df_stat[pd.Series(stat_hash).duplicated(keep=False).to_numpy()][right],
+    )
+    return joined, report
+
+
+def build_candidate_pool(df_main, main_key, df_stat=None, stat_key=None):
+    """Join the Statistics marks onto the Main list and add 'Total_Stat_Marks'."""
+    if df_stat is not None:
+        df_final, _ = join_stat_marks(df_main, main_key, df_stat, stat_key)
+        df_final['Total_Stat_Marks'] = df_final['Main Paper Marks'] + df_final['Stat Marks']
+    else:
+        df_final = df_main.copy()
+        df_final['Total_Stat_Marks'] = df_final['Main Paper Marks']
+    return df_final
+
+
+# the candidate groups a CandidateStore labels (rank index, score distributions)
+GROUP_COLS = ['Category', 'Gender', 'State']
+
+
+@dataclass(frozen=True)
+class CandidateStore:
+    """The candidate columns the allocation engines use, as compact arrays.
+
+    ``ids`` are row positions in the marks list, marks are float32 (the
+    lists only hold half marks, which float32 stores exactly), ``cat`` holds
+    seat codes (see :func:`seat_codes`), ``pass_b``/``pass_c`` the
+    computer qualifying flags and ``sub`` the ESM/PwD sub-quota codes. Built once per process by
+    :func:`load_candidate_store`; every array is read-only so sessions can
+    share it. ``group`` indexes the rows of ``group_labels``, the
+    (Category, Gender, State) combinations present, which the rank index
+    and score distributions are built from.
+    """
+    ids: np.ndarray
+    rolls: np.ndarray
+    main: np.ndarray
+    stat: np.ndarray
+    total: np.ndarray
+    cat: np.ndarray
+    pass_b: np.ndarray
+    pass_c: np.ndarray
+    sub: np.ndarray
+    group: np.ndarray
+    group_labels: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, f).nbytes for f in self.__dataclass_fields__)
+
+
+@profiled('candidate_store', rows=lambda df, *args, **kwargs: len(df))
+def build_candidate_store(df, key_col):
+    """Compact :class:`CandidateStore` of a candidate pool DataFrame."""
+    main, stat, total = _merit_arrays(df)
+    pass_b, pass_c = _pass_flags(df)
+    labels = pd.DataFrame({col: (df[col].astype(str).str.strip() if col in df.columns else 'NA')
+                           for col in GROUP_COLS}, index=df.index)
+    group, group_labels = pd.MultiIndex.from_frame(labels).factorize()
+    arrays = {
+        'ids': np.arange(len(df), dtype=np.int32),
+        'rolls': df[key_col].astype(str).to_numpy(dtype=str),
+        'main': main.astype(np.float32),
+        'stat': stat.astype(np.float32),
+        'total': total.astype(np.float32),
+        'cat': seat_codes(df['Category']).astype(np.uint8),
+        'pass_b': pass_b.astype(bool),
+        'pass_c': pass_c.astype(bool),
+        'sub': (sub_quota_codes(df['Category-2']) if 'Category-2' in df.columns
+                else np.zeros(len(df), dtype=np.uint8)),
+        'group': group.astype(np.int32),
+        'group_labels': np.array(group_labels.tolist(), dtype=str).reshape(-1, len(GROUP_COLS)),
+    }
+    for arr in arrays.values():
+        arr.flags.writeable = False
+    return CandidateStore(**arrays)
+
+
+def as_candidate_store(df, key_col=None):
+    if isinstance(df, CandidateStore):
+        return df
+    return build_candidate_store(df, key_col or _key_column(df))
+
+
+def _pool_signatures(main_file, stat_file):
+    return (file_signature(_fresh_source(main_file, RULES_FILE)),
+            file_signature(_fresh_source(stat_file)),
+            file_signature(_fresh_pool(main_file, stat_file) or ''))
+
+
+def load_candidate_pool(main_file, stat_file):
+    """:func:`build_candidate_pool` for the given marks lists.
+
+    Not cached: the joined frame is only an intermediate, sessions share
+    the compact :func:`load_candidate_store` instead. Reads the snapshot
+    written by :func:`convert_pool_snapshot` when it is up to date.
+    """
+    pool = _fresh_pool(main_file, stat_file)
+    if pool is not None:
+        df = read_snapshot(pool)
+        return df, _key_column(df)
+    df_main, main_key = load_and_clean_data(main_file)
+    if df_main is None:
+        return None, None
+    df_stat, stat_key = load_stat_data(stat_file)
+    return build_candidate_pool(df_main, main_key, df_stat, stat_key), main_key
+
+
+def load_candidate_store(main_file, stat_file):
+    """The :class:`CandidateStore` for the given marks lists, built once per process."""
+    return _load_candidate_store(main_file, stat_file, *_pool_signatures(main_file, stat_file))
+
+
+@_cached(key_args=2)
+def _load_candidate_store(main_file, stat_file, main_signature, stat_signature, pool_signature):
+    df_final, main_key = load_candidate_pool(main_file, stat_file)
+    if df_final is None:
+        return None
+    return build_candidate_store(df_final, main_key)
+
+
+def load_allocation(main_file, stat_file, method='pay_level', horizontal=False):
+    """Allocation for the given marks lists, shared by every session.
+
+    ``method`` is 'pay_level' (:func:`allocate_posts`) or 'preference'
+    (:func:`allocate_by_preference`); ``horizontal`` applies the ESM/PwD
+    quotas. The result is treated as read-only:
+    :func:`insert_candidate` returns a new result instead of modifying it.
+    """
+    return _load_allocation(main_file, stat_file, method, horizontal, *_pool_signatures(main_file, stat_file),
+                            file_signature(_fresh_source(VACANCY_FILE)))
+
+
+@_cached(key_args=4)
+def _load_allocation(main_file, stat_file, method, horizontal, main_signature, stat_signature, pool_signature,
+                     vacancy_signature):
+    store = load_candidate_store(main_file, stat_file)
+    if store is None:
+        return None
+    if method == 'preference':
+        return _freeze(allocate_by_preference(store, get_posts_df(), horizontal=horizontal))
+    return _freeze(allocate_posts(store, get_posts_df(), horizontal=horizontal))
+
+
+# --- CUTOFF TABLE CACHE ---
+# The post-wise cutoffs depend on the marks lists, the vacancy and
+# qualifying-rule files and the allocation options, never on the user's
+# own marks. load_cutoff_table keeps them per process and as a small
+# snapshot on disk, named by a hash of the input paths and a version hash
+# of their contents, so a new server process starts warm and a sidebar
+# edit only re-evaluates the chance labels. Processes serving other files
+# share the directory without replacing each other's tables.
+CUTOFF_CACHE_DIR = os.environ.get('CUTOFF_CACHE_DIR', '.cutoff_cache')
+CUTOFF_CACHE_VERSION = 1  # bump when the allocation rules change
+
+
+def cutoff_table_version(main_file, stat_file, method='pay_level', horizontal=False):
+    """Short hex digest of every input of the cutoff table."""
+    inputs = (CUTOFF_CACHE_VERSION, method, bool(horizontal), *_pool_signatures(main_file, stat_file),
+              file_signature(_fresh_source(VACANCY_FILE)), file_signature(RULES_FILE))
+    return hashlib.sha1(repr(inputs).encode()).hexdigest()[:16]
+
+
+def _input_paths_hash(main_file, stat_file):
+    paths = tuple(os.path.abspath(p) for p in (main_file, stat_file, VACANCY_FILE, RULES_FILE))
+    return hashlib.sha1(repr(paths).encode()).hexdigest()[:8]
+
+
+def cutoff_table_path(main_file, stat_file, method, horizontal, version):
+    return os.path.join(CUTOFF_CACHE_DIR, f"cutoffs-{_input_paths_hash(main_file, stat_file)}-{method}-"
+                                          f"{'h' if horizontal else 'v'}-{version}{SNAPSHOT_EXT}")
+
+
+def load_cutoff_table(main_file, stat_file, method='pay_level', horizontal=False):
+    """The post-wise cutoffs of :func:`load_allocation`, cached in memory and on disk.
+
+    Returns None if the marks list is missing. The table is shared, so
+    callers must not modify it in place.
+    """
+    version = cutoff_table_version(main_file, stat_file, method, horizontal)
+    return _load_cutoff_table(main_file, stat_file, method, horizontal, version)
+
+
+@_cached(key_args=4)
+def _load_cutoff_table(main_file, stat_file, method, horizontal, version):
+    path = cutoff_table_path(main_file, stat_file, method, horizontal, version)
+    if os.path.exists(path):
+        try:
+            return read_snapshot(path)
+        except (OSError, ValueError):
+            pass  # unreadable (e.g. half-written by an older process); rebuild it
+    result = load_allocation(main_file, stat_file, method, horizontal)
+    if result is None:
+        return None
+    _write_cutoff_table(result.cutoffs, path)
+    return result.cutoffs
+
+
+def _write_cutoff_table(cutoffs, path):
+    """Write atomically and drop older versions of the same inputs and options."""
+    from pyarrow import feather
+    prefix = os.path.basename(path).rsplit('-', 1)[0] + '-'  # cutoffs-{paths hash}-{method}-{h|v}-
+    try:
+        os.makedirs(CUTOFF_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(cutoffs, tmp, compression='uncompressed')
+        os.replace(tmp, path)
+        for name in os.listdir(CUTOFF_CACHE_DIR):
+            if name.startswith(prefix) and name.endswith(SNAPSHOT_EXT) and name != os.path.basename(path):
+                os.remove(os.path.join(CUTOFF_CACHE_DIR, name))
+    except OSError:
+        pass  # a read-only deployment still gets the in-process cache
+
+
+CHANCE_LABELS = np.array(
+    ["📉 LOW CHANCE", "❌ FAIL (Comp)", "⚠️ Stat Paper Absent", "⭐ HIGH (UR Merit)", "✅ HIGH CHANCE"],
+    dtype=object,
+)
+LOW, FAIL_COMP, STAT_ABSENT, HIGH_UR, HIGH_CAT = range(len(CHANCE_LABELS))
+
+
+def _chance_codes(cutoffs, main, stat, comp, categories, b_min, c_min):
+    """Chance codes (indices into CHANCE_LABELS) for P profiles x K posts.
+
+    All profile arguments are length-P arrays; the result has shape (P, K).
+    """
+    main, stat, comp, b_min, c_min = (
+        np.asarray(a, dtype=float).reshape(-1, 1) for a in (main, stat, comp, b_min, c_min))
+    is_cpt = cutoffs['IsCPT'].to_numpy(dtype=bool)
+    is_stat = cutoffs['IsStat'].to_numpy(dtype=bool)
+    score = np.where(is_stat, main + stat, main)
+    ur_cut = cutoffs['UR Cutoff'].to_numpy(dtype=float)
+    # one column per reserved category plus a NaN column for UR/unknown
+    cat_table = np.column_stack(
+        [cutoffs[f'{c} Cutoff'].to_numpy(dtype=float) for c in RESERVED_CATEGORIES]
+        + [np.full(len(cutoffs), np.nan)])
+    cat_codes = pd.Categorical(np.asarray(categories, dtype=object), categories=RESERVED_CATEGORIES).codes
+    cat_cut = cat_table[:, cat_codes].T
+
+    codes = np.full(score.shape, LOW, dtype=np.uint8)
+    # lowest priority first, so the earlier rules of the old if/elif win
+    codes[score >= cat_cut] = HIGH_CAT
+    codes[score >= ur_cut] = HIGH_UR
+    codes[np.broadcast_to(is_stat & (stat == 0), codes.shape)] = STAT_ABSENT
+    codes[comp < np.where(is_cpt, c_min, b_min)] = FAIL_COMP
+    return codes
+
+
+def predict_chances(cutoffs, u_marks, u_stat, u_comp, u_cat, rules):
+    """Label each post in ``cutoffs`` with the user's chance of getting it."""
+    u_b_min, u_c_min = rules
+    codes = _chance_codes(cutoffs, [u_marks], [u_stat], [u_comp], [u_cat], [u_b_min], [u_c_min])
+    return CHANCE_LABELS[codes[0]]
+
+
+# --- PART 3b: PREFERENCE-DRIVEN MERIT ALLOCATION ---
+SEAT_TYPES = ['UR'] + RESERVED_CATEGORIES
+
+
+def _merit_arrays(df):
+    """Main, statistics and Main+Stat score arrays of a candidate pool."""
+    main = df['Main Paper Marks'].to_numpy(dtype=float)
+    stat = (df['Stat Marks'].to_numpy(dtype=float) if 'Stat Marks' in df.columns
+            else np.zeros(len(df)))
+    total = (df['Total_Stat_Marks'].to_numpy(dtype=float) if 'Total_Stat_Marks' in df.columns
+             else main + stat)
+    return main, np.nan_to_num(stat), total
+
+
+def _pass_flags(df):
+    if 'Pass_B' in df.columns and 'Pass_C' in df.columns:
+        return df['Pass_B'].to_numpy(dtype=bool), df['Pass_C'].to_numpy(dtype=bool)
+    if 'Computer Marks' in df.columns:
+        return computer_pass_flags(df['Category'], df['Computer Marks'])
+    return np.ones(len(df), dtype=bool), np.ones(len(df), dtype=bool)
+
+
+@heavy
+@profiled('allocate_preference', rows=lambda df, *args, **kwargs: len(df))
+def allocate_by_preference(df, posts_df, key_col=None, preferences=None, pref_group=None, horizontal=False):
+    """SSC-style allocation: candidates are taken in merit order and each
+    gets their highest preferred post that still has a seat for them.
+
+    A seat is an unfilled UR vacancy or, failing that, an unfilled vacancy
+    of the candidate's own category. CPT posts need Pass_C, other posts
+    Pass_B, and statistics posts a statistics score. Merit is Main marks
+    (ties broken on Main+Stat).
+
+    ``preferences`` is a list of preference lists (post positions in
+    ``posts_df``) and ``pref_group`` picks one of them per candidate; by
+    default everyone prefers posts in ``posts_df`` order. A pointer per
+    (preference list, eligibility class, category) skips posts already
+    found full, so the run is O(candidates + posts) amortised.
+    ``df`` is a candidate pool DataFrame or a :class:`CandidateStore`.
+
+    With ``horizontal``, part of each seat is held for ESM/PwD candidates
+    (see :func:`horizontal_quotas`); quotas still unfilled after the merit
+    list is exhausted are released and the remaining candidates get a
+    second pass.
+    """
+    posts = posts_df.reset_index(drop=True)
+    store = as_candidate_store(df, key_col)
+    order, post_of, seat_of = _preference_core(
+        store.main, store.stat, store.total, store.pass_b, store.pass_c, store.cat,
+        posts[SEAT_TYPES].to_numpy(dtype=np.int64),
+        posts['IsCPT'].to_numpy(dtype=bool), posts['IsStat'].to_numpy(dtype=bool),
+        preferences, pref_group,
+        store.sub if horizontal else None, horizontal_quotas(posts) if horizontal else None)
+    return _preference_result(store.rolls, posts, order, post_of, seat_of, store.main, store.total)
+
+
+def seat_codes(categories):
+    """0 for UR (or an unknown category), else the reserved seat column."""
+    codes = pd.Categorical(np.asarray(categories, dtype=object).astype(str), categories=SEAT_TYPES).codes
+    return np.maximum(codes, 0)
+
+
+def _preference_core(main, stat, total, pass_b, pass_c, cat, seats, is_cpt, is_stat,
+                     preferences=None, pref_group=None, sub=None, horizontal=None):
+    """Array form of :func:`allocate_by_preference`.
+
+    Returns the merit order and, per candidate, the post position and seat
+    column they were given (-1 for none). ``sub``/``horizontal`` are the
+    sub-quota codes and :func:`horizontal_quotas` array, or None.
+    """
+    n_posts = len(seats)
+    free = seats.sum(axis=0).tolist()
+    seats = seats.tolist()
+    if horizontal is None:
+        held = [[0] * len(free) for _ in range(n_posts)]
+        quota = None
+        sub = [0] * len(main)
+    else:
+        # seats[p][j] - held[p][j] is what is open to everyone
+        held = horizontal.sum(axis=2).tolist()
+        quota = horizontal.tolist()
+        sub = np.asarray(sub).tolist()
+
+    has_stat = stat > 0
+    # eligibility class: bit 0 = Pass_B, bit 1 = Pass_C, bit 2 = appeared in Statistics
+    cls = (pass_b.astype(np.int64) + 2 * pass_c + 4 * has_stat).tolist()
+    eligible = [
+        (np.where(is_cpt, bool(k & 2), bool(k & 1)) & (~is_stat | bool(k & 4))).tolist()
+        for k in range(8)
     ]
+    cat = np.asarray(cat).tolist()
+
+    if preferences is None:
+        preferences = [list(range(n_posts))]
+    groups = np.zeros(len(main), dtype=np.int64) if pref_group is None else np.asarray(pref_group)
+    groups = groups.tolist()
+
+    order = np.lexsort((-total, -main))
+    post_of = np.full(len(main), -1, dtype=np.int32)
+    seat_of = np.full(len(main), -1, dtype=np.int8)
+
+    def sweep(candidates):
+        pointer = {}
+        for c in candidates:
+            k = cat[c]
+            if free[0] == 0 and (k == 0 or free[k] == 0):
+                if not any(free):
+                    break
+                continue
+            q = sub[c]
+            key = (groups[c], cls[c], k, q)
+            prefs = preferences[groups[c]]
+            elig = eligible[cls[c]]
+            i = pointer.get(key, 0)
+            seat = -1
+            while i < len(prefs):
+                p = prefs[i]
+                if elig[p]:
+                    if seats[p][0] > held[p][0] or (q and quota[p][0][q] > 0):
+                        seat = 0
+                        break
+                    if k and (seats[p][k] > held[p][k] or (q and quota[p][k][q] > 0)):
+                        seat = k
+                        break
+                i += 1
+            pointer[key] = i
+            if seat < 0:
+                continue
+            if q and quota[p][seat][q] > 0:
+                quota[p][seat][q] -= 1
+                held[p][seat] -= 1
+            seats[p][seat] -= 1
+            free[seat] -= 1
+            post_of[c], seat_of[c] = p, seat
+
+    sweep(order.tolist())
+    if quota is not None and any(map(any, held)):
+        # release the quotas nobody qualified for
+        held = [[0] * len(free) for _ in range(n_posts)]
+        quota = np.zeros_like(horizontal).tolist()
+        sweep(order[post_of[order] < 0].tolist())
+    return order, post_of, seat_of
+
+
+def _preference_result(rolls, posts, order, post_of, seat_of, main, total):
+    merit_rank = _inverse(order)
+    took = np.flatnonzero(post_of >= 0)
+    score = np.where(posts['IsStat'].to_numpy(dtype=bool)[post_of[took]], total[took], main[took]).astype(float)
+    seats = pd.DataFrame({'post': post_of[took], 'seat': seat_of[took], 'score': score,
+                          'rank': merit_rank[took], 'roll': rolls[took]})
+    cut = seats.pivot_table(index='post', columns='seat', values='score', aggfunc='min')
+    cut = cut.reindex(index=range(len(posts)), columns=range(len(SEAT_TYPES)))
+    last = seats.groupby('post')['rank'].max().reindex(range(len(posts)))
+
+    cutoffs = pd.DataFrame({'Pay Level': posts['Level'], 'Post': posts['Post']})
+    for j, name in enumerate(SEAT_TYPES):
+        cutoffs[f'{name} Cutoff'] = cut[j].to_numpy()
+    cutoffs['Last Rank'] = last.to_numpy()
+    cutoffs['IsCPT'] = posts['IsCPT'].astype(bool)
+    cutoffs['IsStat'] = posts['IsStat'].astype(bool)
+
+    rolls = seats.groupby('post')['roll'].agg(list)
+    allotted = {name: np.asarray(rolls.get(i, [])) for i, name in enumerate(posts['Post'])}
+    last_rank = dict(zip(posts['Post'], cutoffs['Last Rank']))
+    return AllocationResult(cutoffs=cutoffs, allotted=allotted, last_rank=last_rank)
+
+
+# --- PART 4: RANK INDEX ---
+class RankIndex:
+    """Sorted score arrays answering rank queries with ``np.searchsorted``.
+
+    Rank is one plus the number of candidates scoring strictly more, so a
+    lookup costs O(log n). Every query accepts a single mark or an array of
+    marks and returns ranks of the same shape.
+    """
+
+    def __init__(self, overall, stat=None, categories=None):
+        self.overall = self._sorted(overall)
+        self.stat = self._sorted(stat if stat is not None else [])
+        self.categories = {cat: self._sorted(v) for cat, v in (categories or {}).items()}
+
+    @staticmethod
+    def _sorted(values):
+        values = np.asarray(values, dtype=float)
+        return np.sort(values[~np.isnan(values)])
+
+    @staticmethod
+    def _rank(scores, marks):
+        ranks = len(scores) - np.searchsorted(scores, marks, side='right') + 1
+        return int(ranks) if np.ndim(ranks) == 0 else ranks
+
+    def overall_rank(self, marks):
+        return self._rank(self.overall, marks)
+
+    def stat_rank(self, marks):
+        return self._rank(self.stat, marks)
+
+    def category_rank(self, marks, category):
+        return self._rank(self.categories.get(category, self.overall[:0]), marks)
+
+
+@profiled('rank_index', rows=lambda df, *args, **kwargs: len(df))
+def build_rank_index(df):
+    """Build a :class:`RankIndex` from a :class:`CandidateStore` (or candidate pool).
+
+    The Statistics rank counts the Main + Statistics totals of the
+    candidates who have a Statistics score.
+    """
+    store = as_candidate_store(df)
+    category = store.group_labels[:, GROUP_COLS.index('Category')]
+    categories = {cat: store.main[np.isin(store.group, np.flatnonzero(category == cat))]
+                  for cat in np.unique(category)}
+    return RankIndex(store.main, store.total[store.stat != 0], categories)
+
+
+def load_rank_index(main_file, stat_file):
+    """Cached :func:`build_rank_index` for the given marks lists."""
+    return _load_rank_index(main_file, stat_file, *_pool_signatures(main_file, stat_file))
+
+
+@_cached(key_args=2)
+def _load_rank_index(main_file, stat_file, main_signature, stat_signature, pool_signature):
+    store = load_candidate_store(main_file, stat_file)
+    if store is None:
+        return None
+    return build_rank_index(store)
+
+
+# --- PART 5: BATCH PREDICTION ---
+PROFILE_COLUMNS = {
+    'Main Paper Marks': ['Main Paper Marks', 'Main', 'main'],
+    'Stat Marks': ['Stat Marks', 'Statistics Marks', 'Stat', 'stat'],
+    'Computer Marks': ['Computer Marks', 'Computer', 'computer'],
+    'Category': ['Category', 'category'],
+}
+
+
+def _profile_columns(profiles):
+    """Map the four profile fields to the columns present in ``profiles``."""
+    found = {}
+    for field, aliases in PROFILE_COLUMNS.items():
+        col = next((c for c in aliases if c in profiles.columns), None)
+        if col is None and field != 'Stat Marks':
+            raise ValueError(f"Profiles need a '{field}' column")
+        found[field] = col
+    return found
+
+
+@profiled('batch_predict', rows=lambda cutoffs, profiles, *args, **kwargs: len(profiles))
+def predict_batch(cutoffs, profiles, rank_index=None, rules=None):
+    """Score many candidate profiles against one cutoff table.
+
+    ``profiles`` needs Main, Computer and Category columns (Statistics is
+    optional). Returns the profiles with their ranks (when ``rank_index`` is
+    given), the best post they have a high chance for and one chance label
+    column per post.
+    """
+    cols = _profile_columns(profiles)
+    main = pd.to_numeric(profiles[cols['Main Paper Marks']], errors='coerce').fillna(0).to_numpy(dtype=float)
+    stat = (pd.to_numeric(profiles[cols['Stat Marks']], errors='coerce').fillna(0).to_numpy(dtype=float)
+            if cols['Stat Marks'] else np.zeros(len(profiles)))
+    comp = pd.to_numeric(profiles[cols['Computer Marks']], errors='coerce').fillna(0).to_numpy(dtype=float)
+    cats = profiles[cols['Category']].astype(str).str.strip().str.upper().to_numpy()
+    b_min, c_min = qualifying_thresholds(cats, rules)
+
+    codes = _chance_codes(cutoffs, main, stat, comp, cats, b_min, c_min)
+
+    out = profiles.reset_index(drop=True).copy()
+    if rank_index is not None:
+        out['Overall Rank'] = rank_index.overall_rank(main)
+        out['Stat Rank'] = np.where(stat > 0, rank_index.stat_rank(main + stat), 0)
+        cat_rank = np.zeros(len(out), dtype=np.int64)
+        for cat in np.unique(cats):
+            mask = cats == cat
+            cat_rank[mask] = rank_index.category_rank(main[mask], cat)
+        out['Category Rank'] = cat_rank
+
+    high = (codes == HIGH_UR) | (codes == HIGH_CAT)
+    posts = cutoffs['Post'].to_numpy(dtype=object)
+    out['Best Post'] = np.where(high.any(axis=1), posts[high.argmax(axis=1)], "None")
+    labels = pd.DataFrame(CHANCE_LABELS[codes], columns=posts)
+    return pd.concat([out, labels], axis=1)
+
+
+# --- PART 6: MONTE CARLO CUTOFF UNCERTAINTY ---
+MC_PERCENTILES = [5, 25, 50, 75, 95]
+# one process pool for every simulation, started on first use; each
+# simulation already spreads over all of it, so only a few run at once.
+# Simulations queue on their own threads, never on the engine pool, so a
+# waiting simulation does not hold up inserts, allocations or PDFs.
+MC_WORKERS = int(os.environ.get('MC_WORKERS', 0)) or os.cpu_count() or 1
+MC_CONCURRENCY = int(os.environ.get('MC_CONCURRENCY', 0)) or 2
+_mc_pool = None
+_mc_threads = None
+_mc_lock = threading.Lock()
+# worker-side read-only views of the shared candidate arrays
+_shared = {}
+
+
+def _share_arrays(arrays):
+    """Copy arrays into shared memory; returns the blocks and their specs."""
+    blocks, specs = [], {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        blocks.append(shm)
+        specs[name] = (shm.name, arr.shape, arr.dtype.str)
+    return blocks, specs
+
+
+def _attach_shared(specs):
+    """Map the candidate arrays of a simulation in a worker, once per worker and simulation."""
+    # workers share the parent's resource tracker, and the parent unlinks
+    # the blocks once the simulation is done
+    if all(name in _shared and _shared[name][0].name == shm_name for name, (shm_name, _, _) in specs.items()):
+        return
+    for name, (shm_name, shape, dtype) in specs.items():
+        if name in _shared:
+            _shared.pop(name)[0].close()
+        shm = shared_memory.SharedMemory(name=shm_name)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        view.flags.writeable = False
+        _shared[name] = (shm, view)
+
+
+def _mc_thread_executor():
+    global _mc_threads
+    with _mc_lock:
+        if _mc_threads is None:
+            _mc_threads = ThreadPoolExecutor(MC_CONCURRENCY, thread_name_prefix='monte-carlo')
+        return _mc_threads
+
+
+def _mc_executor():
+    global _mc_pool
+    with _mc_lock:
+        if _mc_pool is None:
+            # spawn rather than fork: forking a threaded Streamlit server is unsafe
+            _mc_pool = ProcessPoolExecutor(max_workers=MC_WORKERS,
+                                           mp_context=multiprocessing.get_context('spawn'))
+        return _mc_pool
+
+
+def _reset_mc_pool(pool):
+    # a worker died; the next simulation starts a fresh pool
+    global _mc_pool
+    with _mc_lock:
+        if _mc_pool is pool:
+            _mc_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _random_preferences(rng, levels, count):
+    """``count`` preference lists: pay level order, shuffled within each level."""
+    prefs = []
+    for _ in range(count):
+        keys = np.lexsort((rng.random(len(levels)), -levels))
+        prefs.append(keys.tolist())
+    return prefs
+
+
+def _simulate_runs(seeds, posts, options, specs):
+    """Worker task: one perturbed preference allocation per seed."""
+    _attach_shared(specs)
+    main0, stat0 = _shared['main'][1], _shared['stat'][1]
+    pass_b0, pass_c0 = _shared['pass_b'][1], _shared['pass_c'][1]
+    cat0 = _shared['cat'][1]
+    n = len(main0)
+    user = options['user']
+    out = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        main = main0.astype(float) + rng.normal(0, options['main_noise'], n)
+        appeared = stat0 > 0
+        stat = np.where(appeared, stat0 + rng.normal(0, options['stat_noise'], n), 0.0)
+        pass_b, pass_c = pass_b0.copy(), pass_c0.copy()
+        if options['absent_rate'] > 0:
+            absent = rng.random(n) < options['absent_rate']
+            pass_b[absent] = pass_c[absent] = False
+        cat, sub = cat0, _shared['sub'][1]
+        if user is not None:
+            main = np.append(main, user['main'])
+            stat = np.append(stat, user['stat'])
+            pass_b = np.append(pass_b, user['pass_b'])
+            pass_c = np.append(pass_c, user['pass_c'])
+            cat = np.append(cat, user['cat'])
+            sub = np.append(sub, user['sub'])
+
+        preferences, groups = None, None
+        if options['pref_groups'] > 0:
+            preferences = _random_preferences(rng, posts['levels'], options['pref_groups'])
+            groups = rng.integers(0, options['pref_groups'], len(main))
+
+        total = main + stat
+        horizontal = posts['horizontal']
+        _, post_of, seat_of = _preference_core(
+            main, stat, total, pass_b, pass_c, cat, posts['seats'],
+            posts['is_cpt'], posts['is_stat'], preferences, groups,
+            sub if horizontal is not None else None, horizontal)
+
+        took = np.flatnonzero(post_of >= 0)
+        score = np.where(posts['is_stat'][post_of[took]], total[took], main[took])
+        cut = np.full(posts['seats'].shape, np.inf)
+        np.minimum.at(cut, (post_of[took], seat_of[took]), score)
+        out.append((np.where(np.isinf(cut), np.nan, cut), int(post_of[n]) if user is not None else -1))
+    return out
+
+
+@heavy(executor=_mc_thread_executor)
+@profiled('monte_carlo', rows=lambda df, posts_df, runs=100, *args, **kwargs: len(df) * runs)
+def simulate_cutoffs(df, posts_df, runs=100, main_noise=2.0, stat_noise=2.0, absent_rate=0.0,
+                     pref_groups=0, user=None, workers=None, seed=0, horizontal=False):
+    """Cutoff uncertainty from ``runs`` perturbed preference allocations.
+
+    Each run adds Gaussian noise to Main/Statistics marks, marks a share of
+    candidates absent and, with ``pref_groups`` > 0, gives candidates one of
+    that many random preference orders (pay level kept, posts within a
+    level shuffled). Runs are spread over the shared process pool
+    (``workers`` sets how many tasks they are split into); the candidate
+    arrays are placed in shared memory once instead of being pickled per
+    task. Identical calls in flight share one simulation, and at most
+    ``MC_CONCURRENCY`` simulations run at once, on their own threads.
+    ``df`` is a candidate pool DataFrame or a :class:`CandidateStore`;
+    ``user`` is an optional dict with main, stat, comp, category and
+    optionally sub_category; ``horizontal`` applies the ESM/PwD quotas.
+
+    Returns ``(percentiles, user_chances)``: cutoff percentiles per post
+    and category, and the share of runs in which the user got each post
+    (None when no user is given).
+    """
+    posts = posts_df.reset_index(drop=True)
+    store = as_candidate_store(df)
+    arrays = {'main': store.main, 'stat': store.stat, 'pass_b': store.pass_b,
+              'pass_c': store.pass_c, 'cat': store.cat, 'sub': store.sub}
+    post_arrays = {
+        'seats': posts[SEAT_TYPES].to_numpy(dtype=np.int64),
+        'is_cpt': posts['IsCPT'].to_numpy(dtype=bool),
+        'is_stat': posts['IsStat'].to_numpy(dtype=bool),
+        'levels': posts['Level'].map(PAY_LEVEL_ORDER).fillna(0).to_numpy(),
+        'horizontal': horizontal_quotas(posts) if horizontal else None,
+    }
+    user_arrays = None
+    if user is not None:
+        u_pass_b, u_pass_c = computer_pass_flags([user['category']], [user['comp']])
+        user_arrays = {
+            'main': float(user['main']), 'stat': float(user.get('stat', 0)),
+            'pass_b': bool(u_pass_b[0]), 'pass_c': bool(u_pass_c[0]),
+            'cat': int(seat_codes([user['category']])[0]),
+            'sub': int(sub_quota_codes([user.get('sub_category', 'none')])[0]),
+        }
+    options = {'main_noise': main_noise, 'stat_noise': stat_noise, 'absent_rate': absent_rate,
+               'pref_groups': pref_groups, 'user': user_arrays}
+
+    workers = workers or MC_WORKERS
+    seeds = np.random.SeedSequence(seed).spawn(runs)
+    chunks = [seeds[i::workers * 4] for i in range(min(runs, workers * 4))]
+    blocks, specs = _share_arrays(arrays)
+    pool = _mc_executor()
+    try:
+        n = len(chunks)
+        results = [r for chunk in pool.map(_simulate_runs, chunks, [post_arrays] * n,
+                                           [options] * n, [specs] * n)
+                   for r in chunk]
+    except BrokenProcessPool:
+        _reset_mc_pool(pool)
+        raise
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    cuts = np.stack([cut for cut, _ in results])
+    rows = []
+    for j, cat in enumerate(SEAT_TYPES):
+        filled = ~np.isnan(cuts[:, :, j])
+        pct = np.full((len(MC_PERCENTILES), len(posts)), np.nan)
+        has_any = filled.any(axis=0)
+        if has_any.any():
+            pct[:, has_any] = np.nanpercentile(cuts[:, has_any, j], MC_PERCENTILES, axis=0)
+        for k in range(len(posts)):
+            row = {'Pay Level': posts['Level'][k], 'Post': posts['Post'][k], 'Category': cat,
+                   'Filled Runs': filled[:, k].mean()}
+            row.update({f'P{q}': pct[i, k] for i, q in enumerate(MC_PERCENTILES)})
+            rows.append(row)
+    percentiles = pd.DataFrame(rows)
+
+    user_chances = None
+    if user is not None:
+        got = np.array([p for _, p in results])
+        names = np.append(posts['Post'].to_numpy(dtype=object), 'No Post')
+        counts = np.bincount(np.where(got >= 0, got, len(posts)), minlength=len(names))
+        user_chances = (pd.DataFrame({'Post': names, 'Probability': counts / len(results)})
+                        .query('Probability > 0')
+                        .sort_values('Probability', ascending=False, ignore_index=True))
+    return percentiles, user_chances
+
+
+# --- PART 7: SCORE DISTRIBUTIONS ---
+# Histograms at half-mark resolution per (category, gender, state) group,
+# built once per marks list, so the Analytics charts and "how many scored
+# at least X" answers cost O(groups x bins) instead of a pass over every
+# candidate on each rerun.
+SCORE_BIN = 0.5
+# score (a CandidateStore array) -> (lowest bin, highest bin); scores outside go to the edge bins
+SCORE_RANGES = {
+    'main': (0.0, 400.0),
+    'stat': (-25.0, 200.0),
+    'total': (-25.0, 600.0),
+}
+
+
+@dataclass(frozen=True)
+class ScoreDistribution:
+    """Per-group score histograms and at-least counts.
+
+    ``groups`` has one row per (Category, Gender, State) present;
+    ``counts[score][g, i]`` is how many candidates of group ``g`` scored
+    in bin ``i`` (``lo + i * SCORE_BIN``) and ``at_least[score][g, i]``
+    how many scored in bin ``i`` or above. Statistics scores only count
+    candidates who have one. Filters (``category``, ``gender``,
+    ``state``) take a value or a list of values; None means all.
+    """
+    groups: pd.DataFrame
+    counts: dict
+    at_least: dict
+
+    def marks(self, score):
+        lo, hi = SCORE_RANGES[score]
+        return lo + np.arange(round((hi - lo) / SCORE_BIN) + 1) * SCORE_BIN
+
+    def _select(self, category=None, gender=None, state=None):
+        mask = np.ones(len(self.groups), dtype=bool)
+        for col, value in zip(GROUP_COLS, (category, gender, state)):
+            if value is not None:
+                mask &= self.groups[col].isin([value] if isinstance(value, str) else value).to_numpy()
+        return mask
 
+    def histogram(self, score, by=None, **filters):
+        """Counts per bin (rows: marks), one column per value of ``by`` or a single 'Candidates' column."""
+        mask = self._select(**filters)
+        index = pd.Index(self.marks(score), name='Marks')
+        if by is None:
+            return pd.DataFrame({'Candidates': self.counts[score][mask].sum(axis=0)}, index=index)
+        keys = self.groups[by].to_numpy()[mask]
+        return pd.DataFrame({k: self.counts[score][mask & (self.groups[by].to_numpy() == k)].sum(axis=0)
+                             for k in sorted(set(keys))}, index=index)
 
-def generate_pdf(df):
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-    from reportlab.lib import colors
-    from reportlab.lib import pagesizes
-    from reportlab.lib.units import inch
-    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-    from reportlab.pdfbase import pdfmetrics
-    
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=pagesizes.A4)
+    def count_at_least(self, score, marks, **filters):
+        """Candidates who scored ``marks`` or more."""
+        lo, _ = SCORE_RANGES[score]
+        i = int(np.ceil((marks - lo) / SCORE_BIN))
+        table = self.at_least[score]
+        if i >= table.shape[1]:
+            return 0
+        return int(table[self._select(**filters), max(i, 0)].sum())
 
-    elements = []
+    def percentile_curve(self, score, **filters):
+        """Percent of the selected candidates scoring at or below each mark."""
+        counts = self.counts[score][self._select(**filters)].sum(axis=0)
+        total = counts.sum()
+        below = np.cumsum(counts) / total * 100 if total else np.zeros(len(counts))
+        return pd.Series(below, index=pd.Index(self.marks(score), name='Marks'), name='Percentile')
 
-    pdfmetrics.registerFont(UnicodeCIDFont('HYSMyeongJo-Medium'))
+    def percentile(self, score, marks, **filters):
+        """Percent of the selected candidates who scored below ``marks``."""
+        total = self.count_at_least(score, SCORE_RANGES[score][0], **filters)
+        return 100 * (1 - self.count_at_least(score, marks, **filters) / total) if total else np.nan
 
-    data = [df.columns.tolist()] + df.astype(str).values.tolist()
 
-    table = Table(data, repeatRows=1)
+@profiled('score_distribution', rows=lambda df, *args, **kwargs: len(df))
+def build_score_distribution(df):
+    """:class:`ScoreDistribution` of a :class:`CandidateStore` (or candidate pool)."""
+    store = as_candidate_store(df)
+    codes = store.group
+    groups = pd.DataFrame(store.group_labels, columns=GROUP_COLS)
+    counts, at_least = {}, {}
+    for score, (lo, hi) in SCORE_RANGES.items():
+        bins = round((hi - lo) / SCORE_BIN) + 1
+        values = getattr(store, score).astype(float)
+        keep = ~np.isnan(values)
+        if score == 'stat':
+            keep &= values != 0  # 0 is "no Statistics paper" in the joined pool
+        index = np.clip(np.rint((values[keep] - lo) / SCORE_BIN), 0, bins - 1).astype(np.int64)
+        table = np.bincount(codes[keep] * bins + index, minlength=len(groups) * bins)
+        table = table.reshape(len(groups), bins).astype(np.int32)
+        counts[score] = table
+        at_least[score] = np.cumsum(table[:, ::-1], axis=1, dtype=np.int32)[:, ::-1]
+    return _freeze(ScoreDistribution(groups=groups, counts=counts, at_least=at_least))
 
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'HYSMyeongJo-Medium'),
-        ('FONTSIZE', (0,0), (-1,-1), 7),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER')
-    ]))
 
-    elements.append(table)
-    doc.build(elements)
+def load_score_distribution(main_file, stat_file):
+    """The :class:`ScoreDistribution` of the given marks lists, built once per process."""
+    return _load_score_distribution(main_file, stat_file, *_pool_signatures(main_file, stat_file))
 
-    buffer.seek(0)
-    return buffer
 
+@_cached(key_args=2)
+def _load_score_distribution(main_file, stat_file, main_signature, stat_signature, pool_signature):
+    store = load_candidate_store(main_file, stat_file)
+    if store is None:
+        return None
+    return build_score_distribution(store)
@@ -0,0 +1,160 @@
+import os
+import pathlib
+import sqlite3
+
+import pandas as pd
+
+# --- HISTORICAL CUTOFF STORE ---
+# Final cutoffs of past years, one row per (year, post, category), in a
+# local SQLite file. Yearly CSVs are bulk-imported once; the trend queries
+# behind the Analytics page and the training frame for train_cutoff_model
+# are then answered from the indexes instead of re-reading every CSV.
+HISTORY_DB = "cutoff_history.db"
+CATEGORIES = ['UR', 'SC', 'ST', 'OBC', 'EWS']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cutoffs (
+    year        INTEGER NOT NULL,
+    pay_level   TEXT,
+    post        TEXT    NOT NULL,
+    category    TEXT    NOT NULL,
+    cutoff      REAL,
+    vacancies   INTEGER,
+    avg_marks   REAL,
+    PRIMARY KEY (year, post, category)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cutoffs_post ON cutoffs (post, category, year);
+CREATE INDEX IF NOT EXISTS idx_cutoffs_category ON cutoffs (category, year);
+"""
+COLUMNS = ['year', 'pay_level', 'post', 'category', 'cutoff', 'vacancies', 'avg_marks']
+
+
+def connect(path=HISTORY_DB):
+    """Open (creating if needed) the history database."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def connect_readonly(path=HISTORY_DB):
+    """Open an existing history database for reading only (nothing is created or written)."""
+    return sqlite3.connect(pathlib.Path(path).resolve().as_uri() + '?mode=ro', uri=True)
+
+
+def _long_format(df, year=None):
+    """Normalise a yearly table to one row per post and category.
+
+    Accepts either the long layout (Year, Post, Category, Cutoff, ...) or the
+    wide post-wise table the app produces ('UR Cutoff', 'SC Cutoff', ...,
+    optionally with 'UR', 'SC', ... vacancy columns).
+    """
+    df = df.rename(columns=lambda c: str(c).strip())
+    if 'Category' in df.columns:
+        if 'Cutoff' not in df.columns and 'Final_Cutoff' not in df.columns:
+            raise ValueError("expected a 'Cutoff' column or '<category> Cutoff' columns")
+        out = pd.DataFrame({
+            'post': df['Post'].astype(str).str.strip(),
+            'category': df['Category'].astype(str).str.strip().str.upper(),
+            'cutoff': pd.to_numeric(df.get('Cutoff', df.get('Final_Cutoff')), errors='coerce'),
+            'vacancies': pd.to_numeric(df.get('Vacancies'), errors='coerce'),
+        })
+        out['pay_level'] = df.get('Pay Level', df.get('Level'))
+        out['year'] = df['Year'] if 'Year' in df.columns else year
+        out['avg_marks'] = pd.to_numeric(df.get('Avg_Marks'), errors='coerce')
+    else:
+        cats = [c for c in CATEGORIES if f"{c} Cutoff" in df.columns]
+        if not cats:
+            raise ValueError("expected a 'Category' column or '<category> Cutoff' columns")
+        parts = []
+        for cat in cats:
+            parts.append(pd.DataFrame({
+                'post': df['Post'].astype(str).str.strip(),
+                'category': cat,
+                'cutoff': pd.to_numeric(df[f"{cat} Cutoff"], errors='coerce'),
+                'vacancies': pd.to_numeric(df[cat], errors='coerce') if cat in df.columns else None,
+                'pay_level': df.get('Pay Level', df.get('Level')),
+                'year': df['Year'] if 'Year' in df.columns else year,
+                'avg_marks': pd.to_numeric(df['Avg_Marks'], errors='coerce') if 'Avg_Marks' in df.columns else None,
+            }))
+        out = pd.concat(parts, ignore_index=True)
+    if out['year'].isna().any():
+        raise ValueError("no year given and the table has no 'Year' column")
+    out['year'] = out['year'].astype(int)
+    return out[COLUMNS]
+
+
+def import_table(conn, df, year=None):
+    """Insert (or replace) a yearly cutoff table in one transaction; returns the row count."""
+    rows = _long_format(df, year).astype(object)
+    rows = rows.where(rows.notna(), None)
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO cutoffs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            rows.itertuples(index=False, name=None),
+        )
+    return len(rows)
+
+
+def import_csv(conn, file_name, year=None):
+    """Bulk-import a yearly CSV; the year defaults to the first 4-digit number in the file name."""
+    if year is None:
+        digits = [w for w in os.path.basename(file_name).replace('_', ' ').replace('-', ' ').split()
+                  if len(w) >= 4 and w[:4].isdigit()]
+        year = int(digits[0][:4]) if digits else None
+    return import_table(conn, pd.read_csv(file_name), year)
+
+
+def record_allocation(conn, cutoffs, year, posts_df=None, avg_marks=None):
+    """Store an allocation result (``AllocationResult.cutoffs``) as that year's cutoffs."""
+    table = cutoffs.copy()
+    if posts_df is not None:
+        vacancies = posts_df.set_index('Post')[CATEGORIES]
+        table = table.join(vacancies, on='Post')
+    if avg_marks is not None:
+        table['Avg_Marks'] = avg_marks
+    return import_table(conn, table, year)
+
+
+def years(conn):
+    return [y for (y,) in conn.execute("SELECT DISTINCT year FROM cutoffs ORDER BY year")]
+
+
+def posts(conn):
+    return [p for (p,) in conn.execute("SELECT DISTINCT post FROM cutoffs ORDER BY post")]
+
+
+def trend(conn, post=None, category=None, pay_level=None):
+    """Cutoffs across years, filtered on any of post / category / pay level."""
+    where, params = [], []
+    for column, value in (('post', post), ('category', category), ('pay_level', pay_level)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    sql = f"SELECT {', '.join(COLUMNS)} FROM cutoffs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY post, category, year"
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def year_table(conn, year):
+    """One year's cutoffs in the app's wide layout ('UR Cutoff', ...)."""
+    df = pd.read_sql_query(
+        "SELECT COALESCE(pay_level, '') AS pay_level, post, category, cutoff FROM cutoffs WHERE year = ?",
+        conn, params=(year,)
+    )
+    wide = df.pivot(index=['pay_level', 'post'], columns='category', values='cutoff')
+    wide = wide.reindex(columns=[c for c in CATEGORIES if c in wide.columns])
+    wide.columns = [f"{c} Cutoff" for c in wide.columns]
+    return wide.reset_index().rename(columns={'pay_level': 'Pay Level', 'post': 'Post'})
+
+
+def training_frame(conn):
+    """Rows usable by ``train_cutoff_model`` (Category, Vacancies, Avg_Marks, Final_Cutoff)."""
+    return pd.read_sql_query(
+        "SELECT year AS Year, post AS Post, category AS Category, vacancies AS Vacancies,"
+        " avg_marks AS Avg_Marks, cutoff AS Final_Cutoff FROM cutoffs"
+        " WHERE cutoff IS NOT NULL AND vacancies IS NOT NULL AND avg_marks IS NOT NULL",
+        conn,
+    )
@@ -0,0 +1,123 @@
+"""Load test for the JSON API (:mod:`core.api`), for sizing deployments.
+
+Opens ``concurrency`` keep-alive connections to a running instance and
+sends a mix of rank, predict, cutoff and batch requests with random
+marks, then reports requests per second and latency percentiles::
+
+    python -m core serve --port 8080 &
+    python -m core loadtest --url http://127.0.0.1:8080 --concurrency 32 --requests 5000
+"""
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+CATEGORIES = ['UR', 'OBC', 'EWS', 'SC', 'ST']
+# share of each request type in the default mix
+MIX = {'rank': 0.45, 'predict': 0.35, 'cutoffs': 0.15, 'batch': 0.05}
+
+
+def _marks(rng):
+    # half marks, like the published lists
+    return round(rng.uniform(200, 380) * 2) / 2
+
+
+def request_mix(count, seed=0, mix=MIX, batch_size=20):
+    """``count`` (verb, target, body) requests drawn from ``mix``."""
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    requests = []
+    for kind in kinds:
+        category = rng.choice(CATEGORIES)
+        if kind == 'rank':
+            requests.append(('GET', '/rank?' + urlencode({'marks': _marks(rng), 'category': category}), b''))
+        elif kind == 'predict':
+            query = {'marks': _marks(rng), 'comp': rng.randint(10, 60), 'category': category}
+            requests.append(('GET', '/predict?' + urlencode(query), b''))
+        elif kind == 'cutoffs':
+            requests.append(('GET', '/cutoffs?' + urlencode({'method': rng.choice(['pay_level', 'preference'])}),
+                             b''))
+        else:
+            profiles = [{'Main Paper Marks': _marks(rng), 'Computer Marks': rng.randint(10, 60),
+                         'Category': rng.choice(CATEGORIES)} for _ in range(batch_size)]
+            requests.append(('POST', '/batch', json.dumps({'profiles': profiles}).encode()))
+    return requests
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    length = next((int(v) for k, _, v in (h.partition(':') for h in lines[1:])
+                   if k.strip().lower() == 'content-length'), 0)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, queue, latencies, failures, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                verb, target, body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            request = (f"{verb} {target} HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+            start = time.perf_counter()
+            try:
+                writer.write(request)
+                await writer.drain()
+                status = await _read_response(reader)
+            except (asyncio.IncompleteReadError, ConnectionError) as err:
+                # the server dropped the connection mid-request: a failed
+                # request, and the next one goes over a new connection
+                errors[type(err).__name__] = errors.get(type(err).__name__, 0) + 1
+                writer.close()
+                writer = None
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                failures[status] = failures.get(status, 0) + 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def run_async(url, requests, concurrency=16):
+    parts = urlsplit(url)
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    latencies, failures, errors = [], {}, {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(parts.hostname, parts.port or 80, queue, latencies, failures, errors)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'requests': len(latencies) + sum(errors.values()),
+        'failed': sum(failures.values()) + sum(errors.values()),
+        'failures_by_status': {str(k): v for k, v in failures.items()},
+        'connection_errors': errors,
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': float(np.percentile(ms, 50)) if len(ms) else None,
+        'p90_ms': float(np.percentile(ms, 90)) if len(ms) else None,
+        'p99_ms': float(np.percentile(ms, 99)) if len(ms) else None,
+        'max_ms': float(ms.max()) if len(ms) else None,
+    }
+
+
+def run(url='http://127.0.0.1:8080', count=2000, concurrency=16, seed=0, warmup=100):
+    """Send ``count`` mixed requests (after ``warmup`` unmeasured ones); returns the summary dict."""
+    if warmup:
+        asyncio.run(run_async(url, request_mix(warmup, seed + 1), concurrency))
+    return asyncio.run(run_async(url, request_mix(count, seed), concurrency))
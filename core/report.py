@@ -0,0 +1,103 @@
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from core.engine import run_heavy, stage
+
+# --- PDF REPORTS ---
+# One place for the PDF tables offered for download by both pages. The CID
+# font is registered once per process, long tables are split into
+# page-sized chunks so ReportLab lays them out in linear time, and the
+# finished bytes are cached on a hash of the table.
+FONT_NAME = 'HYSMyeongJo-Medium'
+ROWS_PER_TABLE = 40
+CACHE_SIZE = 32
+
+_font_lock = threading.Lock()
+_font_registered = False
+_cache_lock = threading.Lock()
+_cache = OrderedDict()
+
+
+def _register_font():
+    global _font_registered
+    with _font_lock:
+        if not _font_registered:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+            pdfmetrics.registerFont(UnicodeCIDFont(FONT_NAME))
+            _font_registered = True
+
+
+def table_hash(df):
+    """Content hash of a table (values, column names and order)."""
+    values = pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+    return hash((tuple(df.columns), values.tobytes()))
+
+
+def _column_widths(cells, header, total_width):
+    # widths follow the longest text in each column, scaled to the page
+    lengths = [max([len(str(h))] + [len(c) for c in col]) for h, col in zip(header, zip(*cells))] if cells \
+        else [len(str(h)) for h in header]
+    scale = total_width / max(sum(lengths), 1)
+    return [max(n, 1) * scale for n in lengths]
+
+
+def build_pdf(df, title=None):
+    """Render ``df`` as a PDF table and return the bytes (no caching)."""
+    with stage('pdf', len(df)):
+        return _build_pdf(df, title)
+
+
+def _build_pdf(df, title):
+    from reportlab.lib import colors, pagesizes
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    _register_font()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=pagesizes.A4)
+
+    elements = []
+    if title:
+        title_style = ParagraphStyle(name="TitleStyle", fontName=FONT_NAME, fontSize=14, alignment=1)
+        elements.append(Paragraph(title, title_style))
+        elements.append(Spacer(1, 12))
+
+    header = [str(c) for c in df.columns]
+    # str() per cell: astype(str) keeps NaN as a float on newer pandas
+    cells = [[str(v) for v in row] for row in df.itertuples(index=False)]
+    widths = _column_widths(cells, header, doc.width)
+    style = TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ])
+    for start in range(0, max(len(cells), 1), ROWS_PER_TABLE):
+        table = Table([header] + cells[start:start + ROWS_PER_TABLE], colWidths=widths, repeatRows=1)
+        table.setStyle(style)
+        elements.append(table)
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def generate_pdf(df, title=None):
+    """PDF bytes for ``df``, cached on the table's content hash."""
+    key = (title, table_hash(df))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    # identical reports requested by several sessions at once are built once
+    pdf = run_heavy(('pdf',) + key, build_pdf, df, title)
+    with _cache_lock:
+        _cache[key] = pdf
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return pdf
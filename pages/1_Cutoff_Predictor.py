@@ -1,11 +1,26 @@
+import io
+
 import streamlit as st
 import pandas as pd
 from core.engine import (
-    load_and_clean_data,
-    load_stat_data,
-    get_full_vacancy_list,
-    generate_pdf
+    load_cutoff_table,
+    PAY_LEVEL_ORDER,
+    predict_chances,
+    qualifying_rule,
+    load_rank_index,
+    predict_batch,
+    load_candidate_store,
+    get_posts_df,
+    simulate_cutoffs,
+    start_profile,
+    profile_records,
+    summarize_profile_log,
 )
+from core.report import generate_pdf
+
+# stage timings of this rerun, shown at the bottom with ?debug=1
+debug = st.query_params.get("debug") == "1"
+start_profile(debug)
 
 st.title("📊 Full Post-wise Cutoff Table + Your Prediction")
 
@@ -14,98 +29,37 @@ u_marks = st.sidebar.number_input("Main Paper Marks", 0.0, 390.0, 310.0)
 u_stat = st.sidebar.number_input("Statistics Marks", 0.0, 200.0, 0.0)
 u_cat = st.sidebar.selectbox("Category", ["UR", "OBC", "EWS", "SC", "ST"])
 u_comp = st.sidebar.number_input("Computer Marks", 0.0, 60.0, 25.0)
+u_sub = st.sidebar.selectbox("ESM / PwD", ["none", "esm", "oh", "hh", "vh", "other-pwd"])
+
+ALLOCATION_METHODS = {
+    "Pay-level order (top-N per post)": "pay_level",
+    "Merit order + post preferences (SSC style)": "preference",
+}
+method_label = st.sidebar.radio("Allocation Method", list(ALLOCATION_METHODS))
+apply_horizontal = st.sidebar.checkbox("Apply ESM / PwD reservation", value=False)
 
 MAIN_FILE = "CSV - SSC CGL Mains 2025 Marks List.xlsx - in.csv"
 STAT_FILE = "CSV - SSC CGL Mains 2025 Statistics Paper Marks List (1).csv"
 
-df_main, main_key = load_and_clean_data(MAIN_FILE)
-df_stat, stat_key = load_stat_data(STAT_FILE)
+# the cutoffs do not depend on your marks: they come from the versioned
+# cache and only the chance labels below are evaluated on each rerun
+cutoffs = load_cutoff_table(MAIN_FILE, STAT_FILE, ALLOCATION_METHODS[method_label], apply_horizontal)
 
-if df_main is None:
+if cutoffs is None:
     st.error(f"File '{MAIN_FILE}' not found!")
     st.stop()
 
-if df_stat is not None:
-    df_final = pd.merge(df_main, df_stat, left_on=main_key, right_on=stat_key, how='left').fillna(0)
-    df_final['Total_Stat_Marks'] = df_final['Main Paper Marks'] + df_final['Stat Marks']
-else:
-    df_final = df_main.copy()
-    df_final['Total_Stat_Marks'] = df_final['Main Paper Marks']
-
-cutoffs_rules = {'UR': (18, 27), 'OBC': (15, 24), 'EWS': (15, 24), 'SC': (12, 21), 'ST': (12, 21)}
-u_b_min, u_c_min = cutoffs_rules.get(u_cat, (12, 21))
-
-# --- VACANCY DATAFRAME ---
-posts = get_full_vacancy_list()
-posts_df = pd.DataFrame(posts, columns=[
-    'Level', 'Post', 'UR', 'SC', 'ST', 'OBC', 'EWS', 'Total', 'IsCPT', 'IsStat'
-])
-pay_level_order = {"L-7": 7, "L-6": 6, "L-5": 5, "L-4": 4}
-posts_df['PayLevelNum'] = posts_df['Level'].map(pay_level_order)
-posts_df = posts_df.sort_values(by='PayLevelNum', ascending=False)
-
-# --- GLOBAL POOL SORTED ---
-df_final['TotalScore'] = df_final['Total_Stat_Marks']
-global_pool = df_final.sort_values(by='TotalScore', ascending=False).copy()
+u_b_min, u_c_min = qualifying_rule(u_cat)
 
 # --- FULL CATEGORY CUTOFF TABLE + USER PREDICTION ---
-display_full = []
-allocated_indices_full = set()
-
-for _, row in posts_df.iterrows():
-    lvl = row['Level']
-    name = row['Post']
-    ur_v, sc_v, st_v, obc_v, ews_v = row['UR'], row['SC'], row['ST'], row['OBC'], row['EWS']
-    is_cpt, is_stat = row['IsCPT'], row['IsStat']
-
-    pool = global_pool[~global_pool.index.isin(allocated_indices_full)]
-    score_col = 'Total_Stat_Marks' if is_stat else 'Main Paper Marks'
-    user_score = (u_marks + u_stat) if is_stat else u_marks
-
-    ur_candidates = pool.head(ur_v)
-    ur_cut = ur_candidates[score_col].min() if not ur_candidates.empty else 0
-    allocated_indices_full.update(ur_candidates.index)
-
-    cat_v_map = {'SC': st_v, 'ST': st_v, 'OBC': obc_v, 'EWS': ews_v}
-    cat_cutoffs = {}
-    user_cat_cut = 0
-    for cat, vac in cat_v_map.items():
-        if vac == 0:
-            cat_cutoffs[cat] = "N/A"
-            continue
-        cat_pool = pool[~pool.index.isin(ur_candidates.index)]
-        cat_pool = cat_pool[cat_pool['Category'] == cat].sort_values(by=score_col, ascending=False).head(vac)
-        cat_cut = cat_pool[score_col].min() if not cat_pool.empty else 0
-        cat_cutoffs[cat] = cat_cut if cat_cut > 0 else "N/A"
-        allocated_indices_full.update(cat_pool.index)
-        if cat == u_cat:
-            user_cat_cut = cat_cut
-
-    req_comp = u_c_min if is_cpt else u_b_min
-    if u_comp < req_comp:
-        chance = "❌ FAIL (Comp)"
-    elif is_stat and u_stat == 0:
-        chance = "⚠️ Stat Paper Absent"
-    elif user_score >= ur_cut and ur_cut > 0:
-        chance = "⭐ HIGH (UR Merit)"
-    elif user_score >= user_cat_cut and user_cat_cut > 0:
-        chance = "✅ HIGH CHANCE"
-    else:
-        chance = "📉 LOW CHANCE"
-
-    display_full.append({
-        "Pay Level": lvl,
-        "Post": name,
-        "UR Cutoff": ur_cut if ur_cut > 0 else "N/A",
-        "SC Cutoff": cat_cutoffs.get('SC', "N/A"),
-        "ST Cutoff": cat_cutoffs.get('ST', "N/A"),
-        "OBC Cutoff": cat_cutoffs.get('OBC', "N/A"),
-        "EWS Cutoff": cat_cutoffs.get('EWS', "N/A"),
-        f"{u_cat} Prediction": chance
-    })
-    
-full_df = pd.DataFrame(display_full)
-full_df['PayLevelNum'] = full_df['Pay Level'].map(pay_level_order)
+full_df = cutoffs.copy()
+full_df[f"{u_cat} Prediction"] = predict_chances(
+    cutoffs, u_marks, u_stat, u_comp, u_cat, (u_b_min, u_c_min)
+)
+full_df = full_df.drop(columns=['Last Rank', 'IsCPT', 'IsStat'])
+cut_cols = ['UR Cutoff', 'SC Cutoff', 'ST Cutoff', 'OBC Cutoff', 'EWS Cutoff']
+full_df[cut_cols] = full_df[cut_cols].astype(object).where(full_df[cut_cols].notna(), "N/A")
+full_df['PayLevelNum'] = full_df['Pay Level'].map(PAY_LEVEL_ORDER)
 full_df = full_df.sort_values(['PayLevelNum', 'Post'], ascending=[False, True])
 
 st.subheader("📊 Full Post-wise Cutoff Table + Your Prediction")
@@ -113,61 +67,97 @@ st.subheader("📊 Full Post-wise Cutoff Table + Your Prediction")
 # At the end:
 
 st.dataframe(full_df.drop(columns='PayLevelNum'), use_container_width=True, hide_index=True)
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib import pagesizes
-from reportlab.platypus import TableStyle
-from reportlab.lib.units import inch
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-import io
-import streamlit as st
-
-def generate_pdf(df):
-    buffer = io.BytesIO()
-
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=pagesizes.A4
-    )
-
-    elements = []
-
-    # Register built-in Unicode font (safe)
-    pdfmetrics.registerFont(UnicodeCIDFont('HYSMyeongJo-Medium'))
-
-    style = ParagraphStyle(
-        name='Normal',
-        fontName='HYSMyeongJo-Medium',
-        fontSize=8
-    )
-
-    # Prepare table data
-    data = [df.columns.tolist()] + df.astype(str).values.tolist()
-
-    table = Table(data, repeatRows=1)
-
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'HYSMyeongJo-Medium'),
-        ('FONTSIZE', (0,0), (-1,-1), 7),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER')
-    ]))
 
-    elements.append(table)
-    doc.build(elements)
-
-    buffer.seek(0)
-    return buffer
-
-pdf_file = generate_pdf(full_df.drop(columns='PayLevelNum'))
+report_df = full_df.drop(columns='PayLevelNum')
 
+# the PDF is only built when the button is clicked
 st.download_button(
     label="⬇️ Download Full Report as PDF",
-    data=pdf_file,
+    data=lambda: generate_pdf(report_df),
     file_name="SSC_CGL_2025_Cutoff_Report.pdf",
     mime="application/pdf"
 )
+
+# --- MONTE CARLO CUTOFF UNCERTAINTY ---
+st.divider()
+st.subheader("🎲 Cutoff Uncertainty (Monte Carlo Simulation)")
+
+with st.expander("Simulation settings"):
+    mc_runs = st.number_input("Simulation runs", 10, 1000, 100, step=10)
+    mc_noise = st.number_input("Mark noise (normalization, ± marks)", 0.0, 20.0, 2.0)
+    mc_absent = st.slider("Share of absentees", 0.0, 0.3, 0.0)
+    mc_prefs = st.number_input("Random preference orders (0 = pay-level order)", 0, 50, 8)
+
+if st.button("▶️ Run Simulation"):
+    candidates = load_candidate_store(MAIN_FILE, STAT_FILE)
+    with st.spinner(f"Running {int(mc_runs)} allocations..."):
+        mc_pct, mc_user = simulate_cutoffs(
+            candidates, get_posts_df(),
+            runs=int(mc_runs), main_noise=mc_noise, stat_noise=mc_noise,
+            absent_rate=mc_absent, pref_groups=int(mc_prefs), horizontal=apply_horizontal,
+            user={'main': u_marks, 'stat': u_stat, 'comp': u_comp, 'category': u_cat, 'sub_category': u_sub}
+        )
+
+    st.markdown("#### Your chance of getting each post")
+    st.dataframe(mc_user, use_container_width=True, hide_index=True)
+
+    st.markdown(f"#### Cutoff range (UR and {u_cat})")
+    st.dataframe(
+        mc_pct[mc_pct['Category'].isin(['UR', u_cat])].round(2),
+        use_container_width=True, hide_index=True
+    )
+
+# --- BATCH "WHAT-IF" MODE ---
+st.divider()
+st.subheader("📂 Batch Prediction for Many Candidates")
+
+uploaded = st.file_uploader(
+    "Upload a CSV/XLSX with Main Paper Marks, Statistics Marks, Computer Marks and Category columns",
+    type=["csv", "xlsx"]
+)
+
+if uploaded is not None:
+    if uploaded.name.lower().endswith(".xlsx"):
+        profiles = pd.read_excel(uploaded)
+    else:
+        profiles = pd.read_csv(uploaded)
+
+    try:
+        batch_df = predict_batch(cutoffs, profiles, load_rank_index(MAIN_FILE, STAT_FILE))
+    except ValueError as err:
+        st.error(f"❌ {err}")
+        st.stop()
+
+    st.success(f"✅ Scored {len(batch_df)} profiles against {len(cutoffs)} posts.")
+    st.dataframe(batch_df, use_container_width=True, hide_index=True)
+
+    xlsx_buffer = io.BytesIO()
+    batch_df.to_excel(xlsx_buffer, index=False)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="⬇️ Download Batch Results (CSV)",
+            data=batch_df.to_csv(index=False).encode("utf-8"),
+            file_name="SSC_CGL_2025_Batch_Prediction.csv",
+            mime="text/csv"
+        )
+    with col2:
+        st.download_button(
+            label="⬇️ Download Batch Results (XLSX)",
+            data=xlsx_buffer.getvalue(),
+            file_name="SSC_CGL_2025_Batch_Prediction.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+# --- DEBUG: STAGE TIMINGS ---
+if debug:
+    st.divider()
+    st.subheader("🛠️ Stage Timings (this rerun)")
+    timings = pd.DataFrame(profile_records())
+    if timings.empty:
+        st.info("No stage ran in this rerun; everything came from the cache.")
+    else:
+        st.dataframe(timings, use_container_width=True, hide_index=True)
+    with st.expander("All sessions (profile log)"):
+        st.dataframe(summarize_profile_log(), use_container_width=True, hide_index=True)
@@ -0,0 +1,83 @@
+import os
+from contextlib import closing
+
+import streamlit as st
+from core import history
+from core.engine import load_score_distribution
+
+MAIN_FILE = "CSV - SSC CGL Mains 2025 Marks List.xlsx - in.csv"
+STAT_FILE = "CSV - SSC CGL Mains 2025 Statistics Paper Marks List (1).csv"
+SCORES = {"Main Paper": "main", "Statistics": "stat", "Main + Statistics": "total"}
+
+# --- SCORE DISTRIBUTION ---
+# every chart below reads the precomputed histograms, not the candidates
+st.title("📊 Score Distribution")
+
+dist = load_score_distribution(MAIN_FILE, STAT_FILE)
+
+if dist is None:
+    st.info(f"Marks list '{MAIN_FILE}' not found.")
+else:
+    score = SCORES[st.radio("Score", list(SCORES), horizontal=True)]
+    col1, col2 = st.columns(2)
+    with col1:
+        gender = st.selectbox("Gender", ["All"] + sorted(dist.groups['Gender'].unique()))
+    with col2:
+        state = st.selectbox("State", ["All"] + sorted(dist.groups['State'].unique()))
+    filters = {'gender': None if gender == "All" else gender, 'state': None if state == "All" else state}
+
+    st.markdown("#### Candidates per half mark, by category")
+    density = dist.histogram(score, by='Category', **filters)
+    scored = density.index[density.sum(axis=1).to_numpy() > 0]
+    st.line_chart(density.loc[scored.min():scored.max()] if len(scored) else density)
+
+    st.markdown("#### Percentile curve")
+    categories = st.multiselect("Categories", sorted(dist.groups['Category'].unique()))
+    curve = dist.percentile_curve(score, category=categories or None, **filters)
+    st.line_chart(curve.loc[scored.min():scored.max()] if len(scored) else curve)
+
+    marks = st.number_input("Candidates at or above marks", -25.0, 600.0, 300.0, step=0.5)
+    cols = st.columns(len(dist.groups['Category'].unique()) + 1)
+    cols[0].metric("All", dist.count_at_least(score, marks, **filters))
+    for col, cat in zip(cols[1:], sorted(dist.groups['Category'].unique())):
+        col.metric(cat, dist.count_at_least(score, marks, category=cat, **filters))
+
+# --- CUTOFF TRENDS ACROSS YEARS ---
+st.divider()
+st.title("📈 Cutoff Trends Across Years")
+
+if not os.path.exists(history.HISTORY_DB):
+    st.info(
+        "No historical cutoffs yet. Import past years with "
+        "`python -m core history import cutoffs_2024.csv` or store this year's "
+        "computed cutoffs with `python -m core history record --year 2025`."
+    )
+    st.stop()
+
+# read-only and closed after this rerun: the page never creates or writes the store
+with closing(history.connect_readonly(history.HISTORY_DB)) as conn:
+    years = history.years(conn)
+    st.caption(f"Years in the store: {', '.join(map(str, years)) or 'none'}")
+
+    # --- TREND FOR ONE POST ---
+    post = st.selectbox("Post", history.posts(conn))
+    categories = st.multiselect("Categories", history.CATEGORIES, default=history.CATEGORIES,
+                                key="trend_categories")
+
+    trend = history.trend(conn, post=post)
+    trend = trend[trend['category'].isin(categories)]
+
+    if trend.empty:
+        st.warning("No cutoffs recorded for this selection.")
+    else:
+        chart = trend.pivot(index='year', columns='category', values='cutoff')
+        chart = chart.reindex(columns=[c for c in categories if c in chart.columns])
+        st.line_chart(chart)
+        st.dataframe(chart.reset_index().rename(columns={'year': 'Year'}), hide_index=True,
+                     use_container_width=True)
+
+    # --- ONE YEAR, ALL POSTS ---
+    if years:
+        st.divider()
+        year = st.selectbox("Year", years[::-1])
+        st.dataframe(history.year_table(conn, year), hide_index=True, use_container_width=True)
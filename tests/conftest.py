@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core import engine  # noqa: E402
+
+# the only marks list in the repository; joined onto itself it is a candidate
+# pool where everyone wrote the Statistics paper
+MARKS_FILE = "CSV - SSC CGL Mains 2025 Statistics Paper Marks List (1).csv"
+# the bundled vacancies exceed the bundled candidates, so seats are scaled
+# down until the allocation has to turn candidates away
+SEAT_SCALE = 8
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _repo_dir():
+    # the engine resolves the vacancy and rules files relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    yield
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope='session')
+def pool():
+    df, key = engine.load_candidate_pool(MARKS_FILE, MARKS_FILE)
+    # published roll numbers are masked and repeat; the checks match candidates by roll
+    return df.assign(**{key: [f"R{i}" for i in range(len(df))]}), key
+
+
+@pytest.fixture(scope='session')
+def posts():
+    posts = engine.get_posts_df().copy()
+    posts[engine.SEAT_TYPES] //= SEAT_SCALE
+    posts[engine.HORIZONTAL_COLS] = -(-posts[engine.HORIZONTAL_COLS] // 2)
+    return posts.reset_index(drop=True)
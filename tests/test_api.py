@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+from conftest import MARKS_FILE
+from core.api import PredictionAPI
+
+
+@pytest.fixture(scope='module')
+def api():
+    return PredictionAPI(MARKS_FILE, MARKS_FILE)
+
+
+@pytest.mark.parametrize('query', ['marks=nan&category=OBC', 'marks=inf&category=OBC',
+                                   'marks=300&category=OBC&stat_marks=-inf'])
+def test_non_finite_marks_are_rejected(api, query):
+    status, payload = api.respond('GET', f'/rank?{query}', b'')
+    assert status == 400
+    assert 'finite' in json.loads(payload)['error']
+
+
+def test_empty_batch_returns_no_rows(api):
+    assert api.respond('POST', '/batch', b'{"profiles": []}') == (200, b'[]')
@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from core import history
+
+
+@pytest.fixture
+def conn():
+    conn = history.connect(':memory:')
+    yield conn
+    conn.close()
+
+
+def test_import_requires_a_cutoff_column(conn):
+    with pytest.raises(ValueError, match="Cutoff"):
+        history.import_table(conn, pd.DataFrame({'Post': ['MEA - ASO'], 'Category': ['UR']}), 2024)
+    assert history.years(conn) == []
+
+
+@pytest.mark.parametrize('table', [
+    pd.DataFrame({'Post': ['MEA - ASO'], 'Category': ['UR'], 'Cutoff': [350.5]}),
+    pd.DataFrame({'Post': ['MEA - ASO'], 'UR Cutoff': [350.5]}),
+])
+def test_import_long_and_wide_tables(conn, table):
+    assert history.import_table(conn, table, 2024) == 1
+    assert history.trend(conn, post='MEA - ASO')['cutoff'].tolist() == [350.5]
@@ -0,0 +1,8 @@
+from core import cli
+
+
+def test_engine_import_stays_within_budget():
+    # best of three cold imports, like `python -m core check-import --repeat 3`
+    elapsed, loaded = min((cli.import_profile() for _ in range(3)), key=lambda r: r[0])
+    assert elapsed <= cli.IMPORT_BUDGET_MS, f"import took {elapsed:.0f} ms"
+    assert not loaded.intersection(cli.LAZY_MODULES), "heavy packages imported eagerly"
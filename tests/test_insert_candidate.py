@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from core import engine
+
+CANDIDATES = [
+    (330.0, 0.0, 'UR', 'none'),
+    (300.0, 120.0, 'OBC', 'none'),
+    (362.0, 144.5, 'SC', 'none'),  # ties the top of the list
+    (280.0, 0.0, 'SC', 'oh'),
+    (250.0, 90.0, 'ST', 'none'),
+    (340.5, 150.0, 'EWS', 'hh'),
+    (120.0, 0.0, 'UR', 'none'),  # gets no post
+]
+
+
+def _with_candidate(df, key, main, stat, category, sub):
+    you = pd.DataFrame({key: ['YOU'], 'Main Paper Marks': [main], 'Stat Marks': [stat],
+                        'Total_Stat_Marks': [main + stat], 'Category': [category],
+                        'Category-2': [sub], 'Pass_B': [True], 'Pass_C': [True]})
+    return pd.concat([df[list(you.columns)].astype(object), you], ignore_index=True)
+
+
+@pytest.mark.parametrize('horizontal', [False, True])
+@pytest.mark.parametrize('main, stat, category, sub', CANDIDATES)
+def test_insert_candidate_matches_full_run(pool, posts, main, stat, category, sub, horizontal):
+    df, key = pool
+    base = engine.allocate_posts(df, posts, key, horizontal=horizontal)
+    inserted, post = engine.insert_candidate(base, main, stat, category, sub_category=sub)
+    full = engine.allocate_posts(_with_candidate(df, key, main, stat, category, sub), posts, key,
+                                 horizontal=horizontal)
+
+    pd.testing.assert_frame_equal(inserted.cutoffs, full.cutoffs)
+    pd.testing.assert_series_equal(pd.Series(inserted.last_rank), pd.Series(full.last_rank),
+                                   check_dtype=False)
+    for name, rolls in full.allotted.items():
+        assert list(inserted.allotted[name]) == list(rolls), name
+    assert post == next((name for name, rolls in full.allotted.items() if 'YOU' in list(rolls)), None)
+
+
+def test_insert_candidate_rejects_preference_results(pool, posts):
+    df, key = pool
+    with pytest.raises(ValueError):
+        engine.insert_candidate(engine.allocate_by_preference(df, posts, key), 330, 0, 'UR')
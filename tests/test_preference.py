@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from core import engine
+
+
+def _brute_force_preference(store, posts, preferences=None, groups=None):
+    """Candidates in merit order, each taking the first preferred post with a free seat."""
+    seats = posts[engine.SEAT_TYPES].to_numpy(dtype=np.int64).copy()
+    is_stat = posts['IsStat'].to_numpy(dtype=bool)
+    is_cpt = posts['IsCPT'].to_numpy(dtype=bool)
+    main, stat, total = (store.main.astype(float), store.stat.astype(float), store.total.astype(float))
+    got = {}
+    for c in np.lexsort((-total, -main)):
+        for p in (preferences[groups[c]] if preferences is not None else range(len(posts))):
+            if is_stat[p] and stat[c] <= 0:
+                continue
+            if not (store.pass_c[c] if is_cpt[p] else store.pass_b[c]):
+                continue
+            for seat in (0, store.cat[c]) if store.cat[c] else (0,):
+                if seats[p, seat] > 0:
+                    seats[p, seat] -= 1
+                    got[store.rolls[c]] = p
+                    break
+            if store.rolls[c] in got:
+                break
+    return got
+
+
+def _posts_of(result, posts):
+    return {roll: p for p, name in enumerate(posts['Post']) for roll in result.allotted[name]}
+
+
+@pytest.mark.parametrize('pref_groups', [0, 4])
+def test_preference_matches_brute_force(pool, posts, pref_groups):
+    df, key = pool
+    store = engine.build_candidate_store(df, key)
+    preferences = groups = None
+    if pref_groups:
+        rng = np.random.default_rng(pref_groups)
+        preferences = [rng.permutation(len(posts)).tolist() for _ in range(pref_groups)]
+        groups = rng.integers(0, pref_groups, len(store))
+    result = engine.allocate_by_preference(store, posts, preferences=preferences, pref_group=groups)
+    assert _posts_of(result, posts) == _brute_force_preference(store, posts, preferences, groups)
+
+
+@pytest.mark.parametrize('method', ['pay_level', 'preference'])
+def test_horizontal_quotas_never_over_allocate(pool, posts, method):
+    df, key = pool
+    store = engine.build_candidate_store(df, key)
+    allocate = engine.allocate_by_preference if method == 'preference' else engine.allocate_posts
+    result = allocate(store, posts, horizontal=True)
+
+    rolls = [roll for name in posts['Post'] for roll in result.allotted[name]]
+    assert len(rolls) == len(set(rolls)), "a candidate holds two posts"
+    cat_of = dict(zip(store.rolls, store.cat))
+    vacancies = posts[engine.SEAT_TYPES].to_numpy(dtype=np.int64)
+    for p, name in enumerate(posts['Post']):
+        cats = np.array([cat_of[roll] for roll in result.allotted[name]], dtype=np.int64)
+        assert len(cats) <= vacancies[p].sum(), name
+        # UR candidates only hold UR seats; each reserved category at most its own plus the UR seats
+        assert (cats == 0).sum() <= vacancies[p, 0], name
+        for j in range(1, len(engine.SEAT_TYPES)):
+            assert (cats == j).sum() <= vacancies[p, 0] + vacancies[p, j], (name, engine.SEAT_TYPES[j])